@@ -34,3 +34,31 @@ class ConstraintChecker_Abstract(ABC):
     
     def isPlausible(self, sg):
         pass
+
+    # Return True if the outcome of isPlausible for a strand graph does not depend on which strand graphs were checked before it.
+    # This is required for the results of a parallel enumeration to match those of a sequential one.
+    def isOrderIndependent(self):
+        return False
+
+    # Check a batch of connected strand graphs, in order, stopping at the first implausible one.
+    # Returns a list of the (flag, info) results from isPlausible for the strand graphs that were checked, i.e., for all of them
+    # if they are all plausible, or else up to and including the first implausible one.
+    # Subclasses may override this to check the strand graphs in parallel, but must return the same results.
+    def arePlausible(self, sgs):
+        results = []
+        for sg in sgs:
+            (flag, info) = self.isPlausible(sg)
+            results.append((flag, info))
+            if not flag:
+                break
+        return results
+
+    # Check a batch of connected strand graphs, returning a list of the (flag, info) results from isPlausible for all of them.
+    # Subclasses may override this to check the strand graphs in parallel, but must return the same results.
+    def checkAll(self, sgs):
+        return [self.isPlausible(sg) for sg in sgs]
+
+    # Release any resources (such as worker processes) held by the checker, e.g., at the end of an enumeration.
+    # The checker can still be used afterwards, and reacquires them as needed.
+    def shutdown(self):
+        pass
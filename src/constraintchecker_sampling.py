@@ -22,8 +22,11 @@
 # 
 ########################################################################
 
+import os
 import math
 import random
+import concurrent.futures
+import probio_lib as lib
 import matplotlib.pyplot as plt
 from constraintchecker_abstract import *
 from constants import *
@@ -37,8 +40,19 @@ from regiongraph import *
 
 class ConstraintChecker_Sampling(ConstraintChecker_Abstract):
 
-    def __init__(self, seed=None):
+    # If orderIndependent is True, the pseudo-random number generator is reseeded for each strand graph that is checked, from the seed
+    # and the strand graph's canonical key. The outcome of each check then depends only on the strand graph being checked, and not
+    # on which other strand graphs have been checked before it, so checks can be cached, reordered, or run in separate processes.
+    # If workers is greater than 1 (which requires orderIndependent), batches of strand graphs passed to checkAll or arePlausible are
+    # checked in that many worker processes. The pool of worker processes is started by the first such batch and kept until shutdown is called.
+    def __init__(self, seed=None, orderIndependent=False, workers=1):
         super().__init__()
+        if workers > 1 and not orderIndependent:
+            lib.error('In ConstraintChecker_Sampling: checking in worker processes requires orderIndependent to be True')
+        self.orderIndependent = orderIndependent
+        self.workers = workers
+        self.pool = None
+        self.poolOwner = None # The process that started the pool (a forked copy of the checker must start its own)
         self.reseed(seed=seed)
         self.ssDomainLengthDist = WormLikeChainLengthDistribution() #UniformLengthDistribution()
         self.dsDomainLengthDist = MaxLengthDistribution()
@@ -47,10 +61,50 @@ class ConstraintChecker_Sampling(ConstraintChecker_Abstract):
         self.dsdsDomainAngleDist = UniformSphereAngleDistribution() #NickedAngleDistribution() #UniformSphereAngleDistribution()
 
     def reseed(self, seed=None):
+        if seed is None and self.orderIndependent:
+            seed = random.SystemRandom().randrange(2**32) # Fixed once here, so that every check (in any process) uses the same one
+        self.seed = seed
         if seed is None:
             self.prng = random.Random()
         else:
             self.prng = random.Random(seed)
+
+    def isOrderIndependent(self):
+        return self.orderIndependent
+
+    # The pool of worker processes cannot be pickled, and is not needed in copies of the checker sent to other processes.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['poolOwner'] = None
+        return state
+
+    # With worker processes, the whole batch is checked in parallel (see checkAll), and the results are then cut short at the first
+    # implausible one. Since the checks are order-independent, this gives the same results as checking them one by one.
+    def arePlausible(self, sgs):
+        if self.workers <= 1 or len(sgs) <= 1:
+            return super().arePlausible(sgs)
+        results = []
+        for (flag, info) in self.checkAll(sgs):
+            results.append((flag, info))
+            if not flag:
+                break
+        return results
+
+    def checkAll(self, sgs):
+        if self.workers <= 1 or len(sgs) <= 1:
+            return super().checkAll(sgs)
+        if self.pool is None or self.poolOwner != os.getpid():
+            self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            self.poolOwner = os.getpid()
+        chunksize = max(1, len(sgs) // (4 * self.workers))
+        return list(self.pool.map(self.isPlausible, sgs, chunksize=chunksize))
+
+    def shutdown(self):
+        if self.pool is not None and self.poolOwner == os.getpid():
+            self.pool.shutdown()
+        self.pool = None
+        self.poolOwner = None
             
     # To check whether a strand graph is physically possible or not.
     def isPlausible(self, sg, debug=False):
@@ -59,6 +113,8 @@ class ConstraintChecker_Sampling(ConstraintChecker_Abstract):
                 print(x)
 
         unsuccessful_trials = 0
+        if self.orderIndependent:
+            self.prng = random.Random(str(self.seed)+':'+str(sg.canonicalKey()))
         #sg.displayRepresentation()
         # Plausability is only checked for connected strand graph
         if (sg.isConnected()):
@@ -35,20 +35,27 @@ except:
 
 class CRN(object):
 
-    def __init__(self, species, reactions):
+    # The unexpanded species (if any) are those that were found but not processed by the enumerator (e.g., because it ran out of
+    # budget), so the reactions that they can take part in may be missing. They are also included in the list of species.
+    def __init__(self, species, reactions, unexpanded_species=[]):
         # Save lists of species and reactions
         self.species = species
         self.reactions = reactions
+        self.unexpanded_species = list(unexpanded_species)
         # Create mapping back from Species objects to string names
         def mkName(ctr):
             return 'sp_'+str(ctr)
         species_names = []
+        species_name_index = {}
         for s in species:
-            for (x,y) in species_names:
-                assert s != x
+            assert s not in species_name_index
             thisName = mkName(len(species_names))
             species_names += [(s, thisName)]
+            species_name_index[s] = thisName
         self.species_names = species_names
+        # Dictionaries for looking up names from species and vice versa (species are hashed on their canonical keys)
+        self.species_name_index = species_name_index
+        self.species_by_name = dict((y,x) for (x,y) in species_names)
         # Compress duplicate or reversible reactions within this CRN
         self.compress()
         # Sanity check
@@ -60,8 +67,11 @@ class CRN(object):
             if not r.isValid():
                 return False
             for s in r.listOfSpeciesInvolved():
-                if s not in self.species:
+                if s not in self.species_name_index:
                     return False
+        for s in self.unexpanded_species:
+            if s not in self.species_name_index:
+                return False
         return True
 
     # Go through and compress all reactions in the current CRN (combine identical ones and reversible reactions!)
@@ -79,15 +89,13 @@ class CRN(object):
         self.reactions = new_reactions
 
     def getSpeciesName(self, s):
-        for (x,y) in self.species_names:
-            if s == x:
-                return y
+        if s in self.species_name_index:
+            return self.species_name_index[s]
         lib.error('In CRN.getSpeciesName, could not find species '+str(s)+' in '+str(self.species_names))
 
     def getSpecies(self, sname):
-        for (x,y) in self.species_names:
-            if sname == y:
-                return x
+        if sname in self.species_by_name:
+            return self.species_by_name[sname]
         #lib.error('In CRN.getSpeciesName, could not find species '+str(sname)+' in '+str(self.species_names))
         return None
 
@@ -120,6 +128,10 @@ class CRN(object):
         res += mkTitle('REACTIONS:')
         for r in self.reactions:
             res += (self.prettyPrintReaction(r) + os.linesep)
+        if self.unexpanded_species != []:
+            res += os.linesep
+            res += mkTitle('UNEXPANDED SPECIES:')
+            res += ', '.join(self.getSpeciesName(s) for s in self.unexpanded_species) + os.linesep
         return res
     
     def displayRepresentation(self):
@@ -134,6 +146,9 @@ class CRN(object):
         for s in self.species:
             print(self.getSpeciesName(s)+':')
             s.displayRepresentation()
+        if self.unexpanded_species != []:
+            print()
+            print('UNEXPANDED SPECIES: ' + ', '.join(self.getSpeciesName(s) for s in self.unexpanded_species))
 
     def psimModel(self):
         if not psimAvailable:
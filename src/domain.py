@@ -89,6 +89,14 @@ class Domain(object):
                 (self.istoehold == other.istoehold) and
                 (self.complemented == (not other.complemented)))
 
+    # Hashable key identifying this domain up to its bond, so that d1.isComplementaryTo(d2) exactly when d1.complementKey() == d2.key().
+    # This allows complementary domains to be found by dictionary lookup rather than pairwise comparison.
+    def key(self):
+        return (self.name, self.istoehold, self.complemented)
+
+    def complementKey(self):
+        return (self.name, self.istoehold, not self.complemented)
+
     def wellFormedBondTo(self, other):
         return (self.isComplementaryTo(other) and
                 (self.bond is not None) and 
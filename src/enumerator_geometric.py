@@ -25,10 +25,15 @@
 # Reaction enumeration settings and code
 
 import probio_lib as lib
+import math
+import time
+import collections
+import concurrent.futures
 from species import * #speciesFromStrandGraph
 from reaction import *
 from crn import *
 from enumerator_abstract import *
+from scheduler_fifo import *
 
 #
 ############################################################################
@@ -38,12 +43,41 @@ from enumerator_abstract import *
 class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
 
     ########################################################################
+
+    # Optional settings, with the default values used when they are not supplied.
+    #  * compactSpecies: if True, switch each species to the compact array-backed representation (see StrandGraph.compact)
+    #    once it has been processed, to reduce memory use on large enumerations. Requires NumPy.
+    #  * workers: the number of worker processes used to compute the bimolecular reactions between each new species and the
+    #    species processed before it. If this is more than 1, the constraint checker must be order-independent, so that the
+    #    resulting CRN is identical to that from a sequential run.
+    #  * waveMode: if True, process species in level-synchronous waves, computing all of the reactions for the current frontier
+    #    of species at once (in parallel, if there are multiple workers) before merging them. The resulting CRN is identical to that
+    #    from the usual sequential algorithm, but this requires an order-independent constraint checker.
+    # The budgets (maxWallTime in seconds, maxSpecies, maxReactions and maxSamplingTrials) are checked before each species is processed
+    # (or, in wave mode, before each wave), so they can be overshot by the work for that species (or wave). When one runs out, the
+    # enumeration stops early and the species still waiting to be processed are returned as unexpanded (see __iterEnumeration__).
+    # If maxComplexSizeMode is 'unexpanded', species larger than maxComplexSize are left unexpanded, rather than raising an error.
+    # The scheduler (see Scheduler_Abstract) decides the order in which species are processed, and can leave species unexpanded too.
+    # It is reset at the start of each enumeration. If it is None, a fresh first-in, first-out scheduler (Scheduler_FIFO) is used.
+    # If deferredPlausibility is True, the plausibility checks for each species (or, in wave mode, for each wave) are deferred and done
+    # in bulk (see reactionsWithDeferredPlausibility). This needs an order-independent constraint checker, which can then parallelize
+    # the checks itself, so it cannot be combined with worker processes.
+    # If symmetryReduction is True, only one transition is generated from each orbit of transitions under the automorphisms of a species
+    # (or pair of species), see TransitionOrbits. This gives the same reactions, but with fewer transitions to check.
+    DEFAULT_SETTINGS = {'compactSpecies': False, 'workers': 1, 'waveMode': False,
+                        'maxWallTime': math.inf, 'maxSpecies': math.inf, 'maxReactions': math.inf, 'maxSamplingTrials': math.inf,
+                        'maxComplexSizeMode': 'error', 'scheduler': None, 'deferredPlausibility': False, 'symmetryReduction': True}
+
+    MAX_RAW_PLAUSIBILITY_KEYS = 4096 # See resetPlausibilityCache
     
     def __init__(self, settings):
         super().__init__()
-        self.settings = settings
-        self.plausible_species = []
-        self.implausible_species = []
+        self.settings = dict(self.DEFAULT_SETTINGS)
+        self.settings.update(settings)
+        self.resetPlausibilityCache()
+        self.exhausted_budget = None # The name of the budget that stopped the last enumeration early, if any
+        self.deferred_candidates = None # The strand graphs whose plausibility checks have been deferred, if they are being deferred
+        self.plausibility_log = None # The (key, flag, sampling_info) outcomes of new plausibility checks, if they are being logged
         assert self.validSettings()
 
     ########################################################################
@@ -54,8 +88,10 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
         VALID_unbindingModeOptions = ['adjacent']
         VALID_enumerationModeOptions = ['detailed']
         VALID_rateOptions = ['bind', 'unbind', 'migrate','displace']
+        VALID_maxComplexSizeModeOptions = ['error', 'unexpanded']
         if sorted(self.settings.keys()) != sorted(['name', 'debug', 'maxComplexSize', 'threeWayMode',
-                                                   'unbindingMode', 'enumerationMode', 'rate', 'constraintChecker']):
+                                                   'unbindingMode', 'enumerationMode', 'rate', 'constraintChecker']
+                                                  + list(self.DEFAULT_SETTINGS.keys())):
             print('Settings error: wrong keys: found '+str(self.settings.keys()))
             return False
         if type(self.settings['name']) != str:
@@ -82,6 +118,49 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
         if sorted(self.settings['rate'].keys()) != sorted(VALID_rateOptions):
             print('Settings error: illegal option for rate: found '+str(self.settings['rate'])+' with type '+str(type(self.settings['rate'])))
             return False            
+        if type(self.settings['compactSpecies']) != bool:
+            print('Settings error: wrong compactSpecies option type: found '+str(self.settings['compactSpecies']))
+            return False
+        if self.settings['compactSpecies'] and not NumpyAvailable:
+            print('Settings error: compactSpecies option requires NumPy, which is not available')
+            return False
+        if type(self.settings['workers']) != int or self.settings['workers'] < 1:
+            print('Settings error: wrong workers option: found '+str(self.settings['workers'])+' with type '+str(type(self.settings['workers'])))
+            return False
+        if self.settings['workers'] > 1 and not self.settings['constraintChecker'].isOrderIndependent():
+            print('Settings error: workers option greater than 1 requires an order-independent constraint checker')
+            return False
+        if type(self.settings['waveMode']) != bool:
+            print('Settings error: wrong waveMode option type: found '+str(self.settings['waveMode']))
+            return False
+        if self.settings['waveMode'] and not self.settings['constraintChecker'].isOrderIndependent():
+            print('Settings error: waveMode option requires an order-independent constraint checker')
+            return False
+        for budget in ['maxWallTime', 'maxSpecies', 'maxReactions', 'maxSamplingTrials']:
+            if type(self.settings[budget]) not in [float, int] or self.settings[budget] < 0:
+                print('Settings error: wrong '+budget+' option: found '+str(self.settings[budget])+' with type '+str(type(self.settings[budget])))
+                return False
+        if self.settings['maxComplexSizeMode'] not in VALID_maxComplexSizeModeOptions:
+            print('Settings error: illegal option for maxComplexSizeMode: found '+str(self.settings['maxComplexSizeMode'])+' with type '+str(type(self.settings['maxComplexSizeMode'])))
+            return False
+        if self.settings['scheduler'] is not None and not isinstance(self.settings['scheduler'], Scheduler_Abstract):
+            print('Settings error: wrong scheduler option type: found '+str(self.settings['scheduler'])+' with type '+str(type(self.settings['scheduler'])))
+            return False
+        if self.settings['waveMode'] and self.settings['scheduler'] is not None and not self.settings['scheduler'].isFIFO():
+            print('Settings error: waveMode option requires a first-in, first-out scheduler')
+            return False
+        if type(self.settings['deferredPlausibility']) != bool:
+            print('Settings error: wrong deferredPlausibility option type: found '+str(self.settings['deferredPlausibility']))
+            return False
+        if self.settings['deferredPlausibility'] and not self.settings['constraintChecker'].isOrderIndependent():
+            print('Settings error: deferredPlausibility option requires an order-independent constraint checker')
+            return False
+        if self.settings['deferredPlausibility'] and self.settings['workers'] > 1:
+            print('Settings error: deferredPlausibility option cannot be combined with a workers option greater than 1')
+            return False
+        if type(self.settings['symmetryReduction']) != bool:
+            print('Settings error: wrong symmetryReduction option type: found '+str(self.settings['symmetryReduction']))
+            return False
         return True
         
     def debugPrint(self, x, debug=False):
@@ -119,34 +198,109 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
         ReachedSites.remove(startSite) # Don't want to return the starting site in this list
         return ReachedSites
 
-    # Method to check if the structure is plausible 
+    # The plausibility cache maps the canonical key of each connected strand graph that has been checked to a pair (flag, sampling_info)
+    # giving the outcome of that check. Only the keys are kept, rather than the checked strand graphs themselves.
+    # The raw plausibility cache maps raw component keys (see StrandGraph.rawComponentKeys) to canonical keys, so that components
+    # that are seen again in the same labeling can be looked up without converting them into canonical form. There is one raw key
+    # for each labeling of each component checked, so only the MAX_RAW_PLAUSIBILITY_KEYS most recently used ones are kept.
+    # The number of sampling trials used by the checks (i.e., those not answered from the cache) is counted too, for the
+    # maxSamplingTrials budget. The shared complementarity tables (see complementarityTableFor) are cleared as well.
+    def resetPlausibilityCache(self):
+        clearComplementarityTables()
+        self.plausibility_cache = {}
+        self.raw_plausibility_cache = collections.OrderedDict()
+        self.plausibility_cache_hits = 0
+        self.plausibility_cache_misses = 0
+        self.sampling_trials = 0
+
+    def plausibilityCacheStats(self):
+        return {'size': len(self.plausibility_cache),
+                'hits': self.plausibility_cache_hits,
+                'misses': self.plausibility_cache_misses,
+                'sampling_trials': self.sampling_trials}
+
+    # Record the outcome of checking the plausibility of a connected strand graph in the plausibility cache.
+    def __recordPlausibility__(self, key, flag, sampling_info):
+        self.plausibility_cache_misses += 1
+        self.plausibility_cache[key] = (flag, sampling_info)
+        self.sampling_trials += sampling_info.get('sampling_unsuccessful_trials', 0) + (1 if flag else 0)
+        if self.plausibility_log is not None:
+            self.plausibility_log.append((key, flag, sampling_info))
+
+    # Method to check if the structure is plausible, i.e., if all of its connected components are plausible.
+    #  * Components already in the cache are looked up, and the structure is implausible as soon as one of them is known to be.
+    #  * The remaining (distinct) components are checked as one batch by the constraint checker (see ConstraintChecker_Abstract.arePlausible),
+    #    which stops at the first implausible one.
+    # While the plausibility checks are being deferred (see reactionsWithDeferredPlausibility), this just records the strand graph
+    # as a candidate to check later, and optimistically returns True.
     def checkPlausibility(self, this):
+        if self.deferred_candidates is not None:
+            self.deferred_candidates.append(this)
+            return True
         cc = self.settings['constraintChecker']
-        comps = this.connectedComponents()
-        for item in comps:
-            for species, sampling_info in self.plausible_species:
-                if (species == item):
-                   return True 
-            for species, sampling_info in self.implausible_species:
-                if (species == item):     
-                    return False        
-            flag, sampling_info = cc.isPlausible(item)
-            if (flag):
-                self.plausible_species.append((item, sampling_info))
-                return True
-            else:
-                self.implausible_species.append((item, sampling_info))
-                return False
-        return False
+        unknown_components = {}
+        for (cdx, raw_key) in enumerate(this.rawComponentKeys()):
+            key = self.__componentKey__(this, cdx, raw_key)
+            if key in self.plausibility_cache:
+                self.plausibility_cache_hits += 1
+                (flag, sampling_info) = self.plausibility_cache[key]
+                if not flag:
+                    return False
+            elif key not in unknown_components:
+                unknown_components[key] = this.connectedComponent(cdx)
+        if len(unknown_components) == 0:
+            return True
+        results = cc.arePlausible(list(unknown_components.values()))
+        for ((key, item), (flag, sampling_info)) in zip(unknown_components.items(), results):
+            self.__recordPlausibility__(key, flag, sampling_info)
+        return all(flag for (flag, sampling_info) in results) and (len(results) == len(unknown_components))
+
+    # Return the canonical key of the component of "this" with the given index and raw key, via the raw plausibility cache.
+    def __componentKey__(self, this, cdx, raw_key):
+        key = self.raw_plausibility_cache.get(raw_key)
+        if key is None:
+            key = this.connectedComponent(cdx).canonicalKey()
+            self.raw_plausibility_cache[raw_key] = key
+            if len(self.raw_plausibility_cache) > self.MAX_RAW_PLAUSIBILITY_KEYS:
+                self.raw_plausibility_cache.popitem(last=False)
+        else:
+            self.raw_plausibility_cache.move_to_end(raw_key)
+        return key
+
+    # Check whether each of the given structures is plausible, returning a list of flags (as for checkPlausibility).
+    # The distinct components of all of the structures that are not already in the cache are checked by the constraint checker in
+    # a single batch (see ConstraintChecker_Abstract.checkAll), which it may parallelize. Unlike checkPlausibility, this checks
+    # every component, rather than stopping at the first implausible one, so it needs an order-independent constraint checker
+    # to give the same results as checking the structures one by one.
+    def checkPlausibilities(self, these):
+        cc = self.settings['constraintChecker']
+        unknown_components = {}
+        component_keys = []
+        for this in these:
+            keys = []
+            for (cdx, raw_key) in enumerate(this.rawComponentKeys()):
+                key = self.__componentKey__(this, cdx, raw_key)
+                if key in self.plausibility_cache:
+                    self.plausibility_cache_hits += 1
+                elif key not in unknown_components:
+                    unknown_components[key] = this.connectedComponent(cdx)
+                keys.append(key)
+            component_keys.append(keys)
+        results = cc.checkAll(list(unknown_components.values()))
+        for ((key, item), (flag, sampling_info)) in zip(unknown_components.items(), results):
+            self.__recordPlausibility__(key, flag, sampling_info)
+        return [all(self.plausibility_cache[key][0] for key in keys) for keys in component_keys]
 
-    def allBindingTransitions(self, this):        
+    def allBindingTransitions(self, this, orbits=None):
         possible_new_edges = this.possibleNewEdges()
-        currently_bound_sites = this.currentlyBoundSites()
+        currently_bound_sites = set(this.currentlyBoundSites())
         all_binding_transitions = []
         for a in possible_new_edges:
             if a.s1 not in currently_bound_sites and a.s2 not in currently_bound_sites :
                 edges_added_in_transition = [a]
                 edges_removed_in_transition = []
+                if (orbits is not None) and orbits.isImageOfEarlierTransition('BINDING', edges_added_in_transition, edges_removed_in_transition):
+                    continue
                 all_edges_involved_in_transition = sorted(edges_added_in_transition + edges_removed_in_transition)
                 new_strand_graph = this.addEdgeToCurrentEdges(a)
                 new_strand_graph.domainLength = this.domainLength        
@@ -158,17 +312,21 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
                                             'edges_removed':edges_removed_in_transition,
                                             'all_edges_involved':all_edges_involved_in_transition,
                                             'new_strand_graph':new_strand_graph,
-                                            'rate': self.settings['rate']['bind']}
+                                            'rate': self.settings['rate']['bind'],
+                                            'multiplicity': 1 if orbits is None else orbits.multiplicity('BINDING', edges_added_in_transition, edges_removed_in_transition)}
                     all_binding_transitions.append(this_binding_transition)
         return all_binding_transitions
 
-    def allUnbindingTransitions(self, this, debug = False):       
+    def allUnbindingTransitions(self, this, debug = False, orbits=None):
         assert this.isConnected()
         all_unbinding_transitions = []
+        toehold_edge_set = this.toeholdEdgeSet()
         for e in this.current_edges:
-            if e in this.toehold_edges:
+            if e in toehold_edge_set:
                 edges_added_in_transition = []
                 edges_removed_in_transition = [e]
+                if (orbits is not None) and orbits.isImageOfEarlierTransition('UNBINDING', edges_added_in_transition, edges_removed_in_transition):
+                    continue
                 all_edges_involved_in_transition = sorted(edges_added_in_transition + edges_removed_in_transition)
                 new_strand_graph = this.removeEdgeFromCurrentEdges(e)
                 new_strand_graph.domainLength = this.domainLength
@@ -199,20 +357,24 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
                                                  'edges_removed':edges_removed_in_transition,
                                                  'all_edges_involved':all_edges_involved_in_transition,
                                                  'new_strand_graph':new_strand_graph,
-                                                 'rate': self.settings['rate']['unbind']}
+                                                 'rate': self.settings['rate']['unbind'],
+                                                 'multiplicity': 1 if orbits is None else orbits.multiplicity('UNBINDING', edges_added_in_transition, edges_removed_in_transition)}
                     all_unbinding_transitions.append(this_unbinding_transition)
         return all_unbinding_transitions
  
-    def allThreeWayMigrationTransitions(self, this):
-        possible_new_edges = this.possibleNewEdges()
-        currently_unbound_sites = this.currentlyUnboundSites()
+    # Edge(s, s2) is a possible new edge exactly when s is unbound and its domain is complementary to that of s2 (which is bound),
+    # so the candidate sites s are looked up by domain key rather than by testing every unbound site.
+    def allThreeWayMigrationTransitions(self, this, orbits=None):
+        unbound_sites_by_domain_key = this.unboundSitesByDomainKey()
         all_threeway_migration_transitions = []
         for edge_to_remove in this.current_edges:
             for (s1, s2) in edge_to_remove.bothWaysRound():
-                for s in currently_unbound_sites:                
+                for s in unbound_sites_by_domain_key.get(this.getDomain(s2).complementKey(), []):
                     edge_to_add = Edge(s, s2)
-                    if edge_to_add in possible_new_edges and this.sameSpecies(s, s2):
-                        new_strand_graph = this.removeEdgeFromCurrentEdges(edge_to_remove).addEdgeToCurrentEdges(edge_to_add)
+                    if (orbits is not None) and orbits.isImageOfEarlierTransition('THREE_WAY_MIGRATION', [edge_to_add], [edge_to_remove]):
+                        continue
+                    if this.sameSpecies(s, s2):
+                        new_strand_graph = this.withCurrentEdgeChanges([edge_to_add], [edge_to_remove])
                         new_strand_graph.domainLength = this.domainLength
                         flag = self.checkPlausibility(new_strand_graph)      
                         if(flag):                            
@@ -225,17 +387,18 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
                                                                 'edges_removed':edges_removed_in_transition,
                                                                 'all_edges_involved':all_edges_involved_in_transition,
                                                                 'new_strand_graph':new_strand_graph,
-                                                                'rate': self.settings['rate']['displace']}                          
+                                                                'rate': self.settings['rate']['displace'],
+                                                                'multiplicity': 1 if orbits is None else orbits.multiplicity('THREE_WAY_MIGRATION', edges_added_in_transition, edges_removed_in_transition)}                          
                             all_threeway_migration_transitions.append(this_threeway_migration_transition)
         return all_threeway_migration_transitions
 
     # Look for 4-way branch migration transitions from "this" species.
     # This function only supports 4-way branch migration, and not n-way migration for n>4.
     # TO DO: maybe generalize to n-way migration?!
-    def allFourWayMigrationTransitions(self, this):
-        possible_new_edges = this.possibleNewEdges()
-        currently_bound_sites = this.currentlyBoundSites()
+    def allFourWayMigrationTransitions(self, this, orbits=None):
+        possible_new_edges = set(this.possibleNewEdges())
         all_fourway_migration_transitions = []
+        edge_sets_involved_so_far = set() # The sets of edges involved in the transitions found so far, for spotting duplicates
         for edge in this.current_edges:
             for (s1,s2) in edge.bothWaysRound():
                 self.debugPrint('Testing edge where s1='+str(s1)+' and s2='+str(s2))
@@ -271,11 +434,11 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
                                             edges_added_in_transition = sorted([first_edge_to_add, second_edge_to_add])
                                             edges_removed_in_transition = sorted([first_edge_to_remove, second_edge_to_remove])
                                             all_edges_involved_in_transition = sorted(edges_added_in_transition + edges_removed_in_transition)
-                                            new_strand_graph = this.removeEdgeFromCurrentEdges(first_edge_to_remove) \
-                                                                   .removeEdgeFromCurrentEdges(second_edge_to_remove) \
-                                                                   .addEdgeToCurrentEdges(first_edge_to_add) \
-                                                                   .addEdgeToCurrentEdges(second_edge_to_add)
-                                            if all_edges_involved_in_transition not in [d['all_edges_involved'] for d in all_fourway_migration_transitions]:
+                                            if (orbits is not None) and orbits.isImageOfEarlierTransition('FOUR_WAY_MIGRATION', edges_added_in_transition, edges_removed_in_transition):
+                                                continue
+                                            if frozenset(all_edges_involved_in_transition) not in edge_sets_involved_so_far:
+                                                new_strand_graph = this.withCurrentEdgeChanges([first_edge_to_add, second_edge_to_add],
+                                                                                               [first_edge_to_remove, second_edge_to_remove])
                                                 new_strand_graph.domainLength = this.domainLength
                                                 flag = self.checkPlausibility(new_strand_graph)      
                                                 if(flag):
@@ -285,101 +448,480 @@ class ReactionEnumerator_Geometric(ReactionEnumerator_Abstract):
                                                                                             'edges_removed':edges_removed_in_transition,
                                                                                             'all_edges_involved':all_edges_involved_in_transition,
                                                                                             'new_strand_graph':new_strand_graph,
-                                                                                            'rate': self.settings['rate']['displace']}
+                                                                                            'rate': self.settings['rate']['displace'],
+                                                                                            'multiplicity': 1 if orbits is None else orbits.multiplicity('FOUR_WAY_MIGRATION', edges_added_in_transition, edges_removed_in_transition)}
                                                         self.debugPrint('TRANSITION INFO: '+str(this_fourway_migration_transition))
                                                         all_fourway_migration_transitions.append(this_fourway_migration_transition)
+                                                        edge_sets_involved_so_far.add(frozenset(all_edges_involved_in_transition))
      
         self.debugPrint(all_fourway_migration_transitions)
         return all_fourway_migration_transitions
 
     # Get all unimolecular transitions possible from "this" species                                                                                                                                         
-    def allUnimolecularTransitions(self, this):
-        bindingTransition = self.allBindingTransitions(this)
-        unbindingTransitions = self.allUnbindingTransitions(this)
-        threeWayMigrationTransitions = self.allThreeWayMigrationTransitions(this)
-        fourWayMigrationTransitions = self.allFourWayMigrationTransitions(this)
+    # If orbits (see TransitionOrbits) is supplied, only one transition is generated from each orbit of transitions under the
+    # automorphisms of "this", and the number of transitions in its orbit is recorded as its multiplicity.
+    def allUnimolecularTransitions(self, this, orbits=None):
+        bindingTransition = self.allBindingTransitions(this, orbits)
+        unbindingTransitions = self.allUnbindingTransitions(this, orbits=orbits)
+        threeWayMigrationTransitions = self.allThreeWayMigrationTransitions(this, orbits)
+        fourWayMigrationTransitions = self.allFourWayMigrationTransitions(this, orbits)
         allTransitions = bindingTransition + unbindingTransitions + threeWayMigrationTransitions + fourWayMigrationTransitions
         return allTransitions
 
     ########################################################################
     
     # Compute all unimolecular reactions possible starting from "this" species
+    # Transitions that are images of each other under an automorphism of "this" lead to the same reaction, so (if the symmetryReduction
+    # setting is on) only one of them is generated and checked for plausibility. The size of its orbit is recorded in the reaction
+    # metadata as its multiplicity, but the rate is NOT scaled by it: without symmetry reduction, the transitions in an orbit give
+    # identical reactions, which are dropped as duplicates rather than combined, so scaling the rate would change the CRN.
     def unimolecularReactions(self, this):
-        allTransitions = self.allUnimolecularTransitions(this)
-        allReactions = []
-        reactants = [this]
-        for t in allTransitions:
-            thisFwdRate = t['rate']
-            theseProducts = [speciesFromStrandGraph(sg) for sg in t['new_strand_graph'].connectedComponents()]
-            thisMetadata = {'type':t['type'], 'edges_added':t['edges_added'], 'edges_removed':t['edges_removed'], 'all_edges_involved':t['all_edges_involved']}
-            thisReaction = Reaction(reactants, thisFwdRate, theseProducts, bwdrate=None,metadata=thisMetadata)
-            if thisReaction not in allReactions:
-                allReactions += [thisReaction]
-        return allReactions
+        return self.reactionsFromTransitions([this], self.unimolecularTransitions(this))
 
     # Compute all bimolecular reactions possible when "this" species is paired with "that" species
     def bimolecularReactions(self, this, that):
-        allTransitions = self.allBindingTransitions(this.compose(that))
+        return self.reactionsFromTransitions([this, that], self.bimolecularTransitions(this, that))
+
+    def unimolecularTransitions(self, this):
+        orbits = TransitionOrbits(this.automorphisms()) if self.settings['symmetryReduction'] else None
+        return self.allUnimolecularTransitions(this, orbits)
+
+    def bimolecularTransitions(self, this, that):
+        if not this.mayBindWith(that):
+            return [] # No point composing them, since there would be no possible new edges
+        orbits = TransitionOrbits(this.automorphismsOfComposition(that)) if self.settings['symmetryReduction'] else None
+        return self.allBindingTransitions(this.compose(that), orbits)
+
+    # Turn the transitions from the given reactants into reactions, dropping any duplicates.
+    # The multiplicity of each transition (see TransitionOrbits) is only recorded in the metadata: the rate is the same either way.
+    def reactionsFromTransitions(self, reactants, allTransitions):
         allReactions = []
-        reactants = [this, that]
+        allReactionsSet = set() # Reactions hash on their reactants, rates and products, as for equality
         for t in allTransitions:
             thisFwdRate = t['rate']
             theseProducts = [speciesFromStrandGraph(sg) for sg in t['new_strand_graph'].connectedComponents()]
-            thisMetadata = {'type':t['type'], 'edges_added':t['edges_added'], 'edges_removed':t['edges_removed'], 'all_edges_involved':t['all_edges_involved']}
+            thisMetadata = {'type':t['type'], 'edges_added':t['edges_added'], 'edges_removed':t['edges_removed'], 'all_edges_involved':t['all_edges_involved'],
+                            'multiplicity':t['multiplicity']}
             thisReaction = Reaction(reactants, thisFwdRate, theseProducts, bwdrate=None, metadata=thisMetadata)
-            if thisReaction not in allReactions:
+            if thisReaction not in allReactionsSet:
                 allReactions += [thisReaction]
+                allReactionsSet.add(thisReaction)
         return allReactions
 
+    # Compute the reactions for each of the given tasks, i.e., the unimolecular reactions of x for a task (x, None) and the bimolecular
+    # reactions between x and y for a task (x, y), with the plausibility checks deferred (see the deferredPlausibility setting):
+    #  1. All of the candidate transitions for all of the tasks are generated first, recording the strand graphs that need checking.
+    #  2. Those strand graphs are then checked together by checkPlausibilities, so that each distinct component is only canonicalized
+    #     and checked once, and the unknown ones go to the constraint checker in a single batch.
+    #  3. Finally, the transitions to implausible strand graphs are dropped, and the rest are turned into reactions.
+    # Provided that the constraint checker is order-independent, this gives the same reactions as checking each candidate as it is
+    # generated, since a transition that is dropped could not have affected which of the other candidates were generated.
+    def reactionsWithDeferredPlausibility(self, tasks):
+        assert self.deferred_candidates is None
+        self.deferred_candidates = []
+        try:
+            allTransitions = [(self.unimolecularTransitions(x) if y is None else self.bimolecularTransitions(x, y)) for (x, y) in tasks]
+            candidates = self.deferred_candidates
+        finally:
+            self.deferred_candidates = None
+        implausible = set(id(sg) for (sg, flag) in zip(candidates, self.checkPlausibilities(candidates)) if not flag)
+        return [self.reactionsFromTransitions([x] if y is None else [x, y], [t for t in transitions if id(t['new_strand_graph']) not in implausible])
+                for ((x, y), transitions) in zip(tasks, allTransitions)]
+
+    # Compute the bimolecular reactions between species x and each of the species ys, in order.
+    # If a pool of worker processes is supplied, the pairs are farmed out to the workers and the verdicts of any plausibility checks
+    # that they do are merged back into the plausibility cache. The results are the same either way, provided that the constraint
+    # checker is order-independent.
+    def allBimolecularReactions(self, x, ys, pool=None):
+        newReactions = []
+        if pool is None:
+            for y in ys:
+                newReactions += self.bimolecularReactions(x, y)
+            return newReactions
+        chunksize = max(1, len(ys) // (4 * self.settings['workers']))
+        for (reacs, plausibility_log) in pool.map(reactionsTask, [x]*len(ys), ys, chunksize=chunksize):
+            newReactions += reacs
+            self.mergePlausibilityResults(plausibility_log)
+        return newReactions
+
+    # Merge the plausibility checks done by a worker process (see reactionsTask) into the plausibility cache.
+    def mergePlausibilityResults(self, plausibility_log):
+        for (key, flag, sampling_info) in plausibility_log:
+            if key not in self.plausibility_cache:
+                self.__recordPlausibility__(key, flag, sampling_info)
+
     def enumerateReactions(self, species_list):
+        return self.__collectEnumeration__([], [], self.iterEnumerateReactions(species_list))
+
+    # Enumerate reactions as a stream of events, returning a generator that yields each event as soon as it is found:
+    #  * {'event':'species', 'species':x} when species x is first discovered, i.e., when it is about to be processed (or left
+    #    unexpanded) as an input species, or just before the first reaction that involves it. So every species in a reaction
+    #    has already been yielded, and each species is only yielded once.
+    #  * {'event':'processed', 'species':x} when species x has been processed (these are yielded in the order that the processed
+    #    species appear in the CRN returned by enumerateReactions).
+    #  * {'event':'reaction', 'reaction':r} for each reaction r found while processing a species (these follow the 'processed'
+    #    event for that species, interleaved with the 'species' events for any new species that they involve).
+    #  * {'event':'unexpanded', 'species':x} for each species x that was left unexpanded, i.e., that was found but not processed,
+    #    because it exceeded maxComplexSize (see the maxComplexSizeMode setting) or because the enumeration ran out of budget.
+    #  * {'event':'budgetExhausted', 'budget':b} as the last event, if the enumeration stopped early because budget b ran out.
+    # The enumeration can be stopped early by closing the generator (or just by not consuming any more events).
+    # The generator only counts the reactions that it has yielded, rather than keeping them, so a consumer that does not keep them
+    # either only needs memory for the species (which must be kept, so that each one is only processed once) and for the plausibility
+    # cache (which keeps the canonical key and verdict of each distinct component checked, but not the component itself).
+    def iterEnumerateReactions(self, species_list):
         assert self.validSettings()                                                                                                                                                                                   
         if not isListOfSpecies(species_list):
             lib.error('In ReactionEnumerator_Original.enumerateReactions: expected list of species as argument, but found: '+str(species_list))
         if not lib.distinct(species_list):
             lib.error('In ReactionEnumerator_Original.enumerateReactions: expected all species in argument list to be unique, but found: '+str(species_list))
-        allReactions = []
-        species_processed = []
-        species_pairs_processed_SORTED = []
-        species_to_process = list(species_list)
-        self.plausible_species = []
-        self.implausible_species = []
-        iterationcount = 1                                                                                                                                                                                 
-        while (species_to_process != []):
-            x = species_to_process.pop(0) # Remove and return first species in the list
-            flag_in_plausible_species = self.checkPlausibility(x)
-            if (not flag_in_plausible_species):
-                continue
+        self.resetPlausibilityCache()
+        return self.__iterEnumeration__([], species_list)
 
-            if x.numVertexes() > self.settings['maxComplexSize']:
-                lib.error('In enumerateReactions: check for possible polymers! Specified max complex size ('+str(self.settings['maxComplexSize'])+') exceeded by following species: '+str(x))
-            #debugPrint('SPECIES X FOR THIS ITERATION:')                                                                                                                                                    
-            #debugPrint(x)   
-            if self.settings['enumerationMode'] == 'detailed':
-                newReactions = self.unimolecularReactions(x)
-            elif self.settings['enumerationMode'] == 'infinite':
-                assert self.allUnimolecularTransitions(x) == []
-                newReactions = []
+    # Extend an existing CRN (e.g., one previously returned by enumerateReactions) with some new species, computing only the reactions
+    # that involve the new species and any further species that become reachable from them. The species of the existing CRN are treated
+    # as already processed, so the reactions between them are taken from the existing CRN rather than recomputed.
+    #  * If a plausibility cache is supplied (see resetPlausibilityCache), it is used to avoid checking structures again. By default,
+    #    the enumerator's current cache is used, e.g., from the enumeration that produced the existing CRN. The cache keys must be
+    #    relative to the colors_info of the existing CRN's species.
+    #  * If the new species introduce new strand types, the existing species, reactions and cache are first re-expressed over the
+    #    merged colors_info (with the same color ordering as enumerating the whole system from scratch would use).
+    # The existing CRN is not modified. The extended CRN is returned, and self.plausibility_cache holds the extended cache afterwards.
+    # With an order-independent constraint checker, the result has the same species and reactions as enumerating from scratch.
+    # Any unexpanded species in the existing CRN (see iterEnumerateReactions) are processed along with the new species, so a partial
+    # CRN can be resumed by calling this with no new species (and larger budgets).
+    def enumerateReactionsFrom(self, crn, new_species, plausibility_cache=None):
+        assert self.validSettings()
+        if not isListOfSpecies(new_species):
+            lib.error('In ReactionEnumerator_Geometric.enumerateReactionsFrom: expected list of species as argument, but found: '+str(new_species))
+        if not lib.distinct(new_species):
+            lib.error('In ReactionEnumerator_Geometric.enumerateReactionsFrom: expected all species in argument list to be unique, but found: '+str(new_species))
+        if plausibility_cache is None:
+            plausibility_cache = self.plausibility_cache
+        unexpanded_species = list(crn.unexpanded_species)
+        unexpanded_species_set = set(unexpanded_species)
+        prior_species = [sp for sp in crn.species if sp not in unexpanded_species_set]
+        prior_reactions = list(crn.reactions)
+        new_species = list(new_species)
+        all_species = list(crn.species) + new_species
+        if not all(sp.compatibleColors(all_species[0]) for sp in all_species):
+            old_colors_info = all_species[0].colors_info
+            colors_info = mergeColorsInfo([sp.colors_info for sp in all_species])
+            def recolorSpecies(sp):
+                return speciesFromStrandGraph(sp.recolored(colors_info))
+            # All of the existing species are recolored, including the unexpanded ones (which may be products of the existing reactions)
+            species_map = dict((sp, recolorSpecies(sp)) for sp in crn.species)
+            prior_species = [species_map[sp] for sp in prior_species]
+            unexpanded_species = [species_map[sp] for sp in unexpanded_species]
+            prior_reactions = [Reaction([species_map[sp] for sp in r.reactants], r.fwdrate, [species_map[sp] for sp in r.products],
+                                        bwdrate=r.bwdrate, metadata=r.metadata)
+                               for r in prior_reactions]
+            new_species = [recolorSpecies(sp) for sp in new_species]
+            plausibility_cache = dict((recolorSpecies(strandGraphFromCanonicalKey(old_colors_info, key)).canonicalKey(), verdict)
+                                      for (key, verdict) in plausibility_cache.items())
+        # The new species can only be compared with the existing ones now that they all have the same colors_info (see Species)
+        unexpanded_species_set = set(unexpanded_species)
+        new_species = unexpanded_species + [sp for sp in new_species if sp not in unexpanded_species_set]
+        self.resetPlausibilityCache()
+        self.plausibility_cache = dict(plausibility_cache)
+        prior_species_set = set(prior_species)
+        events = self.__iterEnumeration__(prior_species, [sp for sp in new_species if sp not in prior_species_set], len(prior_reactions))
+        return self.__collectEnumeration__(prior_species, prior_reactions, events)
+
+    # Build a CRN from the given species and reactions, plus those from a stream of enumeration events.
+    # Any unexpanded species are listed after the processed ones.
+    def __collectEnumeration__(self, species, reactions, events):
+        species = list(species)
+        reactions = list(reactions)
+        unexpanded_species = []
+        for event in events:
+            if event['event'] == 'species':
+                pass # Each species is added when it is processed or left unexpanded
+            elif event['event'] == 'processed':
+                species.append(event['species'])
+            elif event['event'] == 'reaction':
+                reactions.append(event['reaction'])
+            elif event['event'] == 'unexpanded':
+                unexpanded_species.append(event['species'])
+            elif event['event'] == 'budgetExhausted':
+                pass
             else:
                 assert False
-            for y in species_processed:
-                this_sorted_pair = tuple(sorted((x,y)))
-                if this_sorted_pair not in species_pairs_processed_SORTED:
+        return CRN(species + unexpanded_species, reactions, unexpanded_species=unexpanded_species)
+
+    # Run the enumeration as a generator of events (see iterEnumerateReactions), starting from the given lists of processed species
+    # and species to process, and the number of reactions found so far (which counts towards the maxReactions budget).
+    def __iterEnumeration__(self, species_processed, species_list, num_reactions=0):
+        start_time = time.monotonic()
+        self.exhausted_budget = None
+        num_species_processed = len(species_processed)
+        # The species waiting to be processed are held by the scheduler
+        scheduler = self.settings['scheduler'] if self.settings['scheduler'] is not None else Scheduler_FIFO()
+        scheduler.reset(species_list)
+        # Registry of the species that have been processed (species hash on their canonical keys)
+        species_processed_set = set(species_processed)
+        # Registry of the species that have been yielded, or were already known to the caller
+        species_discovered_set = set(species_processed)
+        # Registry mapping each species known so far to the instance of it that is used everywhere, so that all of the reactions
+        # share the same instances as the processed species (including, if they are compacted, the compact ones)
+        species_registry = dict((x, x) for x in list(species_processed) + list(species_list))
+        # Index of the processed species by their unbound domains, so each species is only paired with those it might bind to
+        unbound_domain_index = UnboundDomainIndex(species_processed)
+        # Registry of the species that have been left unexpanded (so they are not queued up again)
+        species_unexpanded_set = set()
+        # Return the event for discovering species x, if it has not been discovered already.
+        def discoverSpecies(x):
+            if x in species_discovered_set:
+                return []
+            species_discovered_set.add(x)
+            return [{'event':'species', 'species':x}]
+        # Record the new reactions found for species x (which has just been processed), queue up any new species that they involve,
+        # and return the corresponding events.
+        def finishSpecies(x, newReactions):
+            nonlocal num_species_processed, num_reactions
+            num_species_processed += 1
+            num_reactions += len(newReactions)
+            species_processed_set.add(x) # Do this before the next loop so we don't double-count species!
+            unbound_domain_index.add(x)
+            if self.settings['compactSpecies']:
+                x.compact()
+            events = discoverSpecies(x) + [{'event':'processed', 'species':x}]
+            for r in newReactions:
+                r.internSpecies(species_registry)
+                for pns in r.listOfSpeciesInvolved():
+                    events += discoverSpecies(pns)
+                    if (pns not in species_processed_set) and (pns not in species_unexpanded_set):
+                        scheduler.push(pns, r)
+                events.append({'event':'reaction', 'reaction':r})
+            return events
+        # Return True if species x should be expanded, i.e., if it does not exceed the max complex size and the scheduler agrees.
+        def checkComplexSize(x):
+            if x.numVertexes() > self.settings['maxComplexSize']:
+                if self.settings['maxComplexSizeMode'] == 'unexpanded':
+                    return False
+                lib.error('In enumerateReactions: check for possible polymers! Specified max complex size ('+str(self.settings['maxComplexSize'])+') exceeded by following species: '+str(x))
+            return scheduler.shouldExpand(x)
+        def leaveUnexpanded(x):
+            species_unexpanded_set.add(x)
+            return discoverSpecies(x) + [{'event':'unexpanded', 'species':x}]
+        # Return the name of the first budget that has run out, if any, or else None.
+        def exhaustedBudget():
+            if time.monotonic() - start_time >= self.settings['maxWallTime']:
+                return 'maxWallTime'
+            if num_species_processed >= self.settings['maxSpecies']:
+                return 'maxSpecies'
+            if num_reactions >= self.settings['maxReactions']:
+                return 'maxReactions'
+            if self.sampling_trials >= self.settings['maxSamplingTrials']:
+                return 'maxSamplingTrials'
+            return None
+        # Stop the enumeration early because the given budget has run out, leaving all of the queued species unexpanded.
+        def stopEarly(budget):
+            self.exhausted_budget = budget
+            events = []
+            while len(scheduler) > 0:
+                events += leaveUnexpanded(scheduler.pop())
+            return events + [{'event':'budgetExhausted', 'budget':budget}]
+        pool = None
+        if self.settings['workers'] > 1:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.settings['workers'], initializer=initializeWorker, initargs=(self,))
+        try:
+            if self.settings['waveMode']:
+                while len(scheduler) > 0:
+                    budget = exhaustedBudget()
+                    if budget is not None:
+                        yield from stopEarly(budget)
+                        return
+                    yield from self.__enumerateWave__(unbound_domain_index, scheduler, pool, finishSpecies, checkComplexSize, leaveUnexpanded)
+                return
+            iterationcount = 1                                                                                                                                                                                 
+            while len(scheduler) > 0:
+                budget = exhaustedBudget()
+                if budget is not None:
+                    yield from stopEarly(budget)
+                    return
+                x = scheduler.pop() # Remove and return the next species to process (by default, the first species in the queue)
+                flag_in_plausible_species = self.checkPlausibility(x)
+                if (not flag_in_plausible_species):
+                    continue
+                if not checkComplexSize(x):
+                    yield from leaveUnexpanded(x)
+                    continue
+                #debugPrint('SPECIES X FOR THIS ITERATION:')                                                                                                                                                    
+                #debugPrint(x)   
+                if self.settings['enumerationMode'] == 'detailed' and self.settings['deferredPlausibility']:
+                    # All of the reactions for x are computed together, with the plausibility checks done in bulk
+                    tasks = [(x, None)] + [(x, y) for y in unbound_domain_index.possiblePartners(x)]
+                    newReactions = sum(self.reactionsWithDeferredPlausibility(tasks), [])
+                else:
                     if self.settings['enumerationMode'] == 'detailed':
-                      reacs = self.bimolecularReactions(x, y)
-                      newReactions += reacs
+                        newReactions = self.unimolecularReactions(x)
+                    elif self.settings['enumerationMode'] == 'infinite':
+                        assert self.allUnimolecularTransitions(x) == []
+                        newReactions = []
                     else:
                         assert False
-                    species_pairs_processed_SORTED += [this_sorted_pair]                                                                                                                                                                            
-            possiblyNewSpecies = []
+                    # Each species is processed exactly once, and is paired with the species processed before it,
+                    # so every pair of processed species is considered exactly once without having to keep track of them.
+                    # Pairs that cannot bind (see StrandGraph.mayBindWith) have no bimolecular reactions, so they are skipped.
+                    if self.settings['enumerationMode'] == 'detailed':
+                        newReactions += self.allBimolecularReactions(x, unbound_domain_index.possiblePartners(x), pool)
+                    else:
+                        assert False
+                yield from finishSpecies(x, newReactions)
+                iterationcount += 1  
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            self.settings['constraintChecker'].shutdown()
 
-            for r in newReactions:
-                assert r not in allReactions                                                                                                                                                                 
-                allReactions += [r]
-                possiblyNewSpecies += r.listOfSpeciesInvolved()
-
-            species_processed += [x] # Do this before the next loop so we don't double-count species!                                                                                                       
-            for pns in possiblyNewSpecies:
-                if (pns not in species_processed) and (pns not in species_to_process):
-                    species_to_process += [pns]
-            iterationcount += 1  
-        return CRN(species_processed, allReactions)
+    # Process one wave of species, i.e., all of the species in the queue when the wave starts (the "frontier"), yielding the events for each.
+    # In the sequential algorithm, the whole frontier is processed before any species discovered while processing it, and each frontier
+    # species is paired with the previously processed species and with the (plausible) frontier species before it. So all of the
+    # reactions for the wave can be computed up front, in parallel if there is a pool of workers, and then merged species by species in
+    # frontier order, exactly as the sequential algorithm would have found them. This needs an order-independent constraint checker.
+    def __enumerateWave__(self, unbound_domain_index, scheduler, pool, finishSpecies, checkComplexSize, leaveUnexpanded):
+        assert self.settings['enumerationMode'] == 'detailed'
+        assert scheduler.isFIFO()
+        frontier = scheduler.queuedSpecies()
+        if self.settings['deferredPlausibility']:
+            plausible = self.checkPlausibilities(frontier)
+        else:
+            plausible = [self.checkPlausibility(x) for x in frontier]
+        # Only compute reactions up to the first species that is too large, since the merge below stops with an error there anyway
+        # (unless such species are just left unexpanded, in which case they are skipped, as are those that the scheduler leaves unexpanded).
+        # Each plausible frontier species is indexed straight away, so that the frontier species after it are paired with it
+        # (indexing it again when it is finished is harmless).
+        tasks = []
+        task_counts = []
+        for (x, flag) in zip(frontier, plausible):
+            if flag:
+                if x.numVertexes() > self.settings['maxComplexSize']:
+                    if self.settings['maxComplexSizeMode'] == 'unexpanded':
+                        continue
+                    break
+                if not scheduler.shouldExpand(x):
+                    continue
+                ys = unbound_domain_index.possiblePartners(x)
+                tasks += [(x, None)] + [(x, y) for y in ys]
+                task_counts.append(1 + len(ys))
+                unbound_domain_index.add(x)
+        if self.settings['deferredPlausibility']:
+            results = self.reactionsWithDeferredPlausibility(tasks)
+        elif pool is None:
+            results = [(self.unimolecularReactions(x) if y is None else self.bimolecularReactions(x, y)) for (x, y) in tasks]
+        else:
+            chunksize = max(1, len(tasks) // (4 * self.settings['workers']))
+            results = []
+            for (reacs, plausibility_log) in pool.map(reactionsTask, [x for (x, y) in tasks], [y for (x, y) in tasks], chunksize=chunksize):
+                results.append(reacs)
+                self.mergePlausibilityResults(plausibility_log)
+        # Merge the results in frontier order
+        results.reverse() # So that the results for each species can be popped off the end in order
+        for (x, flag) in zip(frontier, plausible):
+            popped = scheduler.pop()
+            assert popped == x
+            if not flag:
+                continue
+            if not checkComplexSize(x):
+                yield from leaveUnexpanded(x)
+                continue
+            newReactions = []
+            for i in range(task_counts.pop(0)):
+                newReactions += results.pop()
+            yield from finishSpecies(x, newReactions)
+
+############################################################################
+# Orbits of transitions under the automorphisms of a strand graph (see StrandGraph.automorphisms)
+#
+# The transitions in an orbit all lead to the same reaction, so only the first one seen needs to be generated. The size of its orbit
+# is its multiplicity, i.e., the number of distinct transitions that give that reaction. NB: this is recorded in the reaction metadata,
+# but the reaction rates are not multiplied by it (see ReactionEnumerator_Geometric.unimolecularReactions).
+#
+
+class TransitionOrbits(object):
+
+    def __init__(self, automorphisms):
+        self.automorphisms = automorphisms
+        # Maps the key of every transition seen so far (and of each of its images) to the size of its orbit
+        self.orbit_sizes = {}
+
+    def __key__(self, transition_type, edges_added, edges_removed):
+        return (transition_type, frozenset(edges_added), frozenset(edges_removed))
+
+    # Return True if the transition of the given type, which adds and removes the given edges, is the image of one that has already
+    # been seen (including itself). Otherwise, record its orbit and return False.
+    def isImageOfEarlierTransition(self, transition_type, edges_added, edges_removed):
+        if self.__key__(transition_type, edges_added, edges_removed) in self.orbit_sizes:
+            return True
+        orbit = set(self.__key__(transition_type, [e.__renumbered__(perm) for e in edges_added], [e.__renumbered__(perm) for e in edges_removed])
+                    for perm in self.automorphisms)
+        for key in orbit:
+            self.orbit_sizes[key] = len(orbit)
+        return False
+
+    def multiplicity(self, transition_type, edges_added, edges_removed):
+        return self.orbit_sizes[self.__key__(transition_type, edges_added, edges_removed)]
+
+############################################################################
+# Index of species by their unbound domains, for finding the species that a given species might bind to
+#
+
+class UnboundDomainIndex(object):
+
+    def __init__(self, species_list=[]):
+        self.species_list = []
+        self.positions = {}
+        # Maps each domain key to the positions of the species with an unbound complement of that domain
+        self.positions_by_complement_key = {}
+        # The positions of the species with unbound sites that could bind to each other, which might bind to anything
+        self.internal_positions = []
+        for x in species_list:
+            self.add(x)
+
+    # Add species x to the index, if it is not already there.
+    def add(self, x):
+        if x in self.positions:
+            return
+        pos = len(self.species_list)
+        self.species_list.append(x)
+        self.positions[x] = pos
+        (keys, complement_keys, internal) = x.unboundDomainSignature()
+        for k in complement_keys:
+            self.positions_by_complement_key.setdefault(k, []).append(pos)
+        if internal:
+            self.internal_positions.append(pos)
+
+    # Return the indexed species that x might bind to (i.e., those y for which x.mayBindWith(y)), in the order they were added.
+    def possiblePartners(self, x):
+        (keys, complement_keys, internal) = x.unboundDomainSignature()
+        if internal:
+            return list(self.species_list)
+        positions = set(self.internal_positions)
+        for k in keys:
+            positions.update(self.positions_by_complement_key.get(k, []))
+        return [self.species_list[pos] for pos in sorted(positions)]
+
+############################################################################
+# Worker processes for parallel enumeration (see the 'workers' setting)
+#
+
+# Each worker process holds its own copy of the enumerator (including its plausibility cache).
+workerEnumerator = None
+
+def initializeWorker(enumerator):
+    global workerEnumerator
+    workerEnumerator = enumerator
+
+# Compute the unimolecular reactions of x (if y is None) or the bimolecular reactions between x and y, in a worker process.
+# Returns the reactions, along with the (key, flag, sampling_info) outcomes of the plausibility checks that were newly done, so that
+# they can be merged into the main plausibility cache without sending the checked strand graphs back.
+def reactionsTask(x, y=None):
+    workerEnumerator.plausibility_log = []
+    try:
+        if y is None:
+            reactions = workerEnumerator.unimolecularReactions(x)
+        else:
+            reactions = workerEnumerator.bimolecularReactions(x, y)
+        return (reactions, workerEnumerator.plausibility_log)
+    finally:
+        workerEnumerator.plausibility_log = None
@@ -109,7 +109,7 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
     # This uses the boundSitesReachableVersionOne() method from above to look for graph
     # traversals that enclose either end of the specified edge.
     def hidden(self, this, e):
-        assert e not in this.current_edges # Should only be checking a prospective new edge here
+        assert e not in this.currentEdgeSet() # Should only be checking a prospective new edge here
         (s1, s2) = e.getSites()
         # Special case: check if both sites are on the same strand and have no bonds in between - forming such edges is OK (i.e., the edge is NOT hidden and the function returns False).
         if e.withinOneStrand(): #if s1.v == s2.v:
@@ -205,7 +205,7 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
 
     def allBindingTransitions(self, this):
         possible_new_edges = this.possibleNewEdges()
-        currently_bound_sites = this.currentlyBoundSites()
+        currently_bound_sites = set(this.currentlyBoundSites())
         all_binding_transitions = []
         for a in possible_new_edges:
             # hidden predicate checks for binding in hairpin loops etc. Is it too restrictive???
@@ -226,8 +226,9 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
 
     def allUnbindingTransitions(self, this):
         all_unbinding_transitions = []
+        toehold_edge_set = this.toeholdEdgeSet()
         for e in this.current_edges:
-            if e in this.toehold_edges:
+            if e in toehold_edge_set:
             #if e in this.toehold_edges and not self.anchored(this, e): # Using the strgsd definition of anchored predicate, at least for now...
             ##if e in this.toehold_edges and not this.has_adjacent(e): # A bit more permissive than commented test
                 if self.settings['unbindingMode'] == 'adjacent':
@@ -252,8 +253,8 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
     # This "adjacent" version only does 3-way reactions where the invader is immediately adjacent to the incumbent.
     # It does not permit 3-way initiated 4-way migration, or remote toehold-style reactions.
     def allThreeWayMigrationTransitions_Adjacent(self, this):
-        possible_new_edges = this.possibleNewEdges()
-        currently_bound_sites = this.currentlyBoundSites()
+        possible_new_edges = set(this.possibleNewEdges())
+        currently_bound_sites = set(this.currentlyBoundSites())
         all_threeway_migration_transitions = []
         for direction in ['toward5prime', 'toward3prime']:
             for edge in this.current_edges:
@@ -292,7 +293,7 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
     # If 'anchored_traversal' then a more permissive version of "anchored" based on graph traversal is used.
     #   The 'traversal' version permits both 3-way initiated 4-way migration and remote toehold-style reactions.
     def allThreeWayMigrationTransitions_Anchored(self, this):
-        possible_new_edges = this.possibleNewEdges()
+        possible_new_edges = set(this.possibleNewEdges())
         currently_unbound_sites = this.currentlyUnboundSites()
         all_threeway_migration_transitions = []
         for edge_to_remove in this.current_edges:
@@ -335,8 +336,7 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
         def debugPrint(x):
             if debug:
                 print(x)
-        possible_new_edges = this.possibleNewEdges()
-        currently_bound_sites = this.currentlyBoundSites()
+        possible_new_edges = set(this.possibleNewEdges())
         all_fourway_migration_transitions = []
         for edge in this.current_edges:
             for (s1,s2) in edge.bothWaysRound():
@@ -602,7 +602,6 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
             lib.error('In ReactionEnumerator_Original.enumerateReactions: expected all species in argument list to be unique, but found: '+str(species_list))
         allReactions = []
         species_processed = []
-        species_pairs_processed_SORTED = []
         species_to_process = list(species_list)
         #iterationcount = 1
         while (species_to_process != []):
@@ -613,9 +612,6 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
             #debugPrint('species_processed:')
             #for s in species_processed:
             #    debugPrint(s)
-            ##debugPrint('species_pairs_processed_SORTED:')
-            ##for sp in species_pairs_processed_SORTED:
-            ##    debugPrint(sp)
             #debugPrint('species_to_process:')
             #for s in species_to_process:
             #    debugPrint(s)
@@ -634,16 +630,15 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
                 newReactions = []
             else:
                 assert False
+            # Each species is processed exactly once, and is paired with the species processed before it,
+            # so every pair of processed species is considered exactly once without having to keep track of them.
             for y in species_processed:
-                this_sorted_pair = tuple(sorted((x,y)))
-                if this_sorted_pair not in species_pairs_processed_SORTED:
-                    if self.settings['enumerationMode'] == 'detailed':
-                        newReactions += self.bimolecularReactions(x, y)
-                    elif self.settings['enumerationMode'] == 'infinite':
-                        newReactions += self.bimolecularMergedReactions(x, y)
-                    else:
-                        assert False
-                    species_pairs_processed_SORTED += [this_sorted_pair]
+                if self.settings['enumerationMode'] == 'detailed':
+                    newReactions += self.bimolecularReactions(x, y)
+                elif self.settings['enumerationMode'] == 'infinite':
+                    newReactions += self.bimolecularMergedReactions(x, y)
+                else:
+                    assert False
             #debugPrint('newReactions found:')
             #for r in newReactions:
             #    debugPrint(r)
@@ -669,9 +664,6 @@ class ReactionEnumerator_Original(ReactionEnumerator_Abstract):
             #debugPrint('species_processed:')
             #for s in species_processed:
             #    debugPrint(s)
-            ##debugPrint('species_pairs_processed_SORTED:')
-            ##for sp in species_pairs_processed_SORTED:
-            ##    debugPrint(sp)
             #debugPrint('species_to_process:')
             #for s in species_to_process:
             #    debugPrint(s)
@@ -94,6 +94,11 @@ class Reaction(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    # Consistent with __eq__, since species hash on their canonical keys (so reactions can be deduplicated via sets and dicts).
+    def __hash__(self):
+        (reactants, fwdrate, bwdrate, products) = self.__metric__()
+        return hash((tuple(reactants), fwdrate, bwdrate, tuple(products)))
+
     def __lt__(self, other):
         return self.__metric__() < other.__metric__()
 
@@ -121,6 +126,12 @@ class Reaction(object):
         else:
             return None
 
+    # Replace each reactant and product with the equal species in the given registry (a dict mapping each species to the instance
+    # to use for it), adding any that are not there yet, so that reactions can share the same species instances.
+    def internSpecies(self, registry):
+        self.reactants = [registry.setdefault(x, x) for x in self.reactants]
+        self.products = [registry.setdefault(x, x) for x in self.products]
+
     def listOfSpeciesInvolved(self):
         res = []
         for x in self.reactants + self.products:
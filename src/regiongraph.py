@@ -359,7 +359,7 @@ def condenseStrandGraphToRegionList(sg, debug=False):
             print(x)
     totalNucleotideLength = 0
     regions = []
-    visited_sites= []
+    visited_sites = set()
     sites = sg.getSites()
     i = 0
     label = 0
@@ -381,7 +381,7 @@ def condenseStrandGraphToRegionList(sg, debug=False):
             regions.append(Region(reg_ssDNA, None, totalNucleotideLength, label))
             debugPrint("label: "+str(label))
             label += 1
-            visited_sites += reg_ssDNA
+            visited_sites.update(reg_ssDNA)
         else:
                 d1_comp = sg.getBindingPartner(sites[i])
                 reg_dsDNA_s1 = [sites[i]]
@@ -411,8 +411,8 @@ def condenseStrandGraphToRegionList(sg, debug=False):
                     regions.append(Region(reg_dsDNA_s1, reg_dsDNA_s2, totalNucleotideLength, label))
                     debugPrint("label: "+str(label))
                     label += 1
-                    visited_sites += reg_dsDNA_s1
-                    visited_sites += reg_dsDNA_s2
+                    visited_sites.update(reg_dsDNA_s1)
+                    visited_sites.update(reg_dsDNA_s2)
         i = (i + 1)
     return regions
 
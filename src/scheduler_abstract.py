@@ -0,0 +1,92 @@
+########################################################################
+#
+# scheduler_abstract.py
+#
+########################################################################
+# 
+# GeometricEnumerator
+# Copyright (C) 2023 Sarika Kumar & Matthew Lakin
+# 
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>. 
+# 
+########################################################################
+
+# Abstract superclass for defining schedulers, which decide the order in which the enumerator processes the species waiting
+# to be processed, and whether each one is expanded at all (see the 'scheduler' setting of ReactionEnumerator_Geometric).
+from abc import ABC, abstractmethod
+
+class Scheduler_Abstract(ABC):
+
+    def __init__(self):
+        super().__init__()
+        self.depths = {}
+
+    # Start a new enumeration, with the given (input) species waiting to be processed.
+    def reset(self, species_list):
+        self.depths = {}
+        self.clear()
+        for x in species_list:
+            self.push(x)
+
+    # The depth of a species is its reaction distance from the input species, i.e., 0 for an input species (or for a species that
+    # was never queued, such as the existing species in an incremental enumeration) and otherwise one more than the largest depth
+    # of the reactants of the reaction via which it was found (the smallest such value, if the scheduler updates it).
+    def depthOf(self, x):
+        return self.depths.get(x, 0)
+
+    def depthVia(self, reaction):
+        if reaction is None:
+            return 0
+        return 1 + max(self.depthOf(sp) for sp in reaction.reactants)
+
+    #
+    # ABSTRACT METHODS:
+    #
+
+    # Remove all of the species waiting to be processed.
+    @abstractmethod
+    def clear(self):
+        pass
+
+    # Queue up species x, found in the given reaction (or None for an input species), unless it is already waiting to be processed.
+    # The enumerator only calls this for species that have not been processed already.
+    @abstractmethod
+    def push(self, x, reaction=None):
+        pass
+
+    # Remove and return the next species to process.
+    @abstractmethod
+    def pop(self):
+        pass
+
+    # Return the list of species waiting to be processed, in the order that they would be popped.
+    @abstractmethod
+    def queuedSpecies(self):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @abstractmethod
+    def __contains__(self, x):
+        pass
+
+    # Return False if species x should be left unexpanded when it is popped.
+    def shouldExpand(self, x):
+        return True
+
+    # Return True if the species are popped in the order that they were first pushed, as the enumerator's wave mode requires.
+    def isFIFO(self):
+        return False
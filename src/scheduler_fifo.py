@@ -0,0 +1,68 @@
+########################################################################
+#
+# scheduler_fifo.py
+#
+########################################################################
+# 
+# GeometricEnumerator
+# Copyright (C) 2023 Sarika Kumar & Matthew Lakin
+# 
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>. 
+# 
+########################################################################
+
+# First-in, first-out (i.e., breadth-first) scheduling, which is the enumerator's default.
+# If maxDepth is given, species whose depth (see Scheduler_Abstract.depthOf) is maxDepth or more are left unexpanded,
+# e.g., with maxDepth=1 only the input species are expanded.
+
+import collections
+import math
+from scheduler_abstract import *
+
+class Scheduler_FIFO(Scheduler_Abstract):
+
+    def __init__(self, maxDepth=math.inf):
+        super().__init__()
+        self.maxDepth = maxDepth
+        self.clear()
+
+    def clear(self):
+        self.queue = collections.deque()
+        self.queued = set() # Species hash on their canonical keys
+
+    def push(self, x, reaction=None):
+        if x not in self.queued:
+            self.depths[x] = self.depthVia(reaction)
+            self.queue.append(x)
+            self.queued.add(x)
+
+    def pop(self):
+        x = self.queue.popleft()
+        self.queued.remove(x)
+        return x
+
+    def queuedSpecies(self):
+        return list(self.queue)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __contains__(self, x):
+        return x in self.queued
+
+    def shouldExpand(self, x):
+        return self.depthOf(x) < self.maxDepth
+
+    def isFIFO(self):
+        return True
@@ -0,0 +1,87 @@
+########################################################################
+#
+# scheduler_priority.py
+#
+########################################################################
+# 
+# GeometricEnumerator
+# Copyright (C) 2023 Sarika Kumar & Matthew Lakin
+# 
+# This program is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>. 
+# 
+########################################################################
+
+# Schedulers that process the species waiting to be processed in order of a priority (smallest first), with ties broken in the
+# order that the species were queued. The priority of a queued species can be lowered by finding it again; the old heap entry
+# is then skipped when it reaches the top.
+
+import heapq
+from scheduler_abstract import *
+
+class Scheduler_Priority(Scheduler_Abstract):
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.heap = []
+        self.priorities = {} # Maps each queued species to its current priority
+        self.counter = 0
+
+    # ABSTRACT METHOD: return the priority of species x, found in the given reaction (or None for an input species).
+    @abstractmethod
+    def priority(self, x, reaction):
+        pass
+
+    def push(self, x, reaction=None):
+        depth = self.depthVia(reaction)
+        if x in self.priorities:
+            self.depths[x] = min(self.depths[x], depth)
+        else:
+            self.depths[x] = depth
+        p = self.priority(x, reaction)
+        if (x not in self.priorities) or (p < self.priorities[x]):
+            self.priorities[x] = p
+            heapq.heappush(self.heap, (p, self.counter, x))
+            self.counter += 1
+
+    def pop(self):
+        while True:
+            (p, count, x) = heapq.heappop(self.heap)
+            if self.priorities.get(x) == p:
+                del self.priorities[x]
+                return x
+
+    def queuedSpecies(self):
+        return [x for (p, count, x) in sorted(self.heap) if self.priorities.get(x) == p]
+
+    def __len__(self):
+        return len(self.priorities)
+
+    def __contains__(self, x):
+        return x in self.priorities
+
+# Process the smallest complexes (by number of strands) first, so that polymerizing networks are explored from the bottom up.
+class Scheduler_SmallestFirst(Scheduler_Priority):
+
+    def priority(self, x, reaction):
+        return x.numVertexes()
+
+# Process the species closest to the input species (by reaction distance, i.e., depth) first. Unlike first-in, first-out
+# scheduling, this takes account of shorter routes to a queued species that are found after it was first queued.
+class Scheduler_ClosestToInput(Scheduler_Priority):
+
+    def priority(self, x, reaction):
+        return self.depthOf(x)
@@ -41,15 +41,53 @@ import math
 class Species(StrandGraph):
 
     # Initializer essentially just checks that the species is connected
-    def __init__(self, colors_info, vertex_colors, admissible_edges, toehold_edges, current_edges, domainLength):
-        super().__init__(colors_info, vertex_colors, admissible_edges, toehold_edges, current_edges, domainLength)
+    # If isCanonical is True, the caller guarantees that the edges are already in canonical form (e.g., because they came from
+    # a strand graph that has already been converted to canonical form), and canonicalization is skipped.
+    def __init__(self, colors_info, vertex_colors, current_edges, domainLength, isCanonical=False):
+        super().__init__(colors_info, vertex_colors, current_edges, domainLength)
         if self.isConnected():
+            if isCanonical:
+                self.__isCanonical__ = True
             self.__convertToCanonicalForm__()
         else:
             errMsg = 'Tried to create a Species object from the following non-connected strand graph:'+os.linesep+str(self)
             lib.error(errMsg)
             #print('ERROR: '+str(errMsg)) # Commented this out for testing purposes. Ultimately want to crash if this happens!
 
+    # Equality, ordering and hashing of species are all based on the canonical key, which is computed once (the species is
+    # already in canonical form and connected, so the key determines the species for a given colors_info).
+    # The hash of the key is cached even for compact species (see StrandGraph.compact), so equality compares the hashes first.
+    # NB: as for strand graphs, equality and ordering are only defined between species with compatible colors!
+    # The hash ignores the colors_info, so species with incompatible colors (e.g., from systems with different strand types) can
+    # have the same hash, and comparing them raises an AssertionError. So they must never be put in the same set or dict: recolor
+    # them onto a merged colors_info first (see mergeColorsInfo and StrandGraph.recolored).
+
+    def __hash__(self):
+        return self.canonicalHash()
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Species):
+            return super().__eq__(other)
+        assert self.compatibleColors(other)
+        return self.sameCanonicalKey(other)
+
+    def __ne__(self, other):
+        return not(self.__eq__(other))
+
+    def __lt__(self, other):
+        if not isinstance(other, Species):
+            return super().__lt__(other)
+        assert self.compatibleColors(other)
+        return self.canonicalKey() < other.canonicalKey()
+
+    def __gt__(self, other):
+        if not isinstance(other, Species):
+            return super().__gt__(other)
+        assert self.compatibleColors(other)
+        return self.canonicalKey() > other.canonicalKey()
+
 #
 # Additional helper functions for species
 #
@@ -66,7 +104,7 @@ def isListOfSpecies(xs):
 # Given a connected strand graph, convert it into a Species object
 def speciesFromStrandGraph(sg):
     assert sg.isConnected()
-    return Species(sg.colors_info, sg.vertex_colors, sg.admissible_edges, sg.toehold_edges, sg.current_edges, sg.domainLength)
+    return Species(sg.colors_info, sg.vertex_colors, sg.current_edges, sg.domainLength, isCanonical=sg.isCanonical())
 
 # Given a process, convert it into a list of species (NB: there may be some duplicates?!)
 def speciesListFromProcess(p):
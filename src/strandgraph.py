@@ -25,11 +25,18 @@
 from process import *
 import probio_lib as lib
 import os
+import bisect
+import collections
 try:
     import graphviz
     GraphvizAvailable = True
 except:
     GraphvizAvailable = False
+try:
+    import numpy
+    NumpyAvailable = True
+except:
+    NumpyAvailable = False
 
 
 ############################################################################################################
@@ -40,12 +47,26 @@ except:
 #
 class Site(object):
 
+    # Sites are immutable value types, so they can be hashed and used as set members and dict keys.
+    # NB: as with equality, the hash only depends on the vertex and site numbers (not on nmax).
+    __slots__ = ('v', 'n', 'nmax', 'hashValue')
+
     def __init__(self, v, n, nmax):
-        self.v = v
-        self.n = n
-        self.nmax = nmax
+        object.__setattr__(self, 'v', v)
+        object.__setattr__(self, 'n', n)
+        object.__setattr__(self, 'nmax', nmax)
+        object.__setattr__(self, 'hashValue', hash((v, n)))
         # assert self.isValid()
 
+    def __setattr__(self, name, value):
+        raise AttributeError('Site objects are immutable: cannot set attribute '+str(name))
+
+    def __delattr__(self, name):
+        raise AttributeError('Site objects are immutable: cannot delete attribute '+str(name))
+
+    def __reduce__(self):
+        return (Site, (self.v, self.n, self.nmax))
+
     # def isValid(self, debug=True):
     #     def debugPrint(x):
     #         if debug:
@@ -90,6 +111,9 @@ class Site(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return self.hashValue
+
     def __lt__(self, other):
         return (self.v, self.n) < (other.v, other.n)
 
@@ -129,6 +153,11 @@ class Site(object):
         assert self.v is not None
         return Site(vmap.index(self.v), self.n, self.nmax)
 
+    # As __relabeled__, but using the inverse of the mapping, "inv", which maps each old vertex number to its new one.
+    # This avoids searching the vmap list for every site when relabeling a whole strand graph.
+    def __renumbered__(self, inv):
+        return Site(inv[self.v], self.n, self.nmax)
+
 ############################################################################################################
 
 #
@@ -136,15 +165,27 @@ class Site(object):
 #
 class Edge(object):
 
+    # Edges are immutable value types, so they can be hashed and used as set members and dict keys.
+    __slots__ = ('s1', 's2', 'hashValue')
     
     def __init__(self, s1, s2): ## Use the ordering on sites to store edges canonically
         if s1 < s2:
-            self.s1 = s1
-            self.s2 = s2
+            object.__setattr__(self, 's1', s1)
+            object.__setattr__(self, 's2', s2)
         else:
-            self.s1 = s2
-            self.s2 = s1
+            object.__setattr__(self, 's1', s2)
+            object.__setattr__(self, 's2', s1)
+        object.__setattr__(self, 'hashValue', hash((self.s1.v, self.s1.n, self.s2.v, self.s2.n)))
         # assert self.isValid()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Edge objects are immutable: cannot set attribute '+str(name))
+
+    def __delattr__(self, name):
+        raise AttributeError('Edge objects are immutable: cannot delete attribute '+str(name))
+
+    def __reduce__(self):
+        return (Edge, (self.s1, self.s2))
         
     # def isValid(self, debug=True):
     #     def debugPrint(x):
@@ -175,6 +216,9 @@ class Edge(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return self.hashValue
+
     def __lt__(self, other):
         return (self.s1, self.s2) < (other.s1, other.s2)
     
@@ -191,6 +235,10 @@ class Edge(object):
         assert lib.distinct([z for z in vmap if z is not None])
         return Edge(self.s1.__relabeled__(vmap), self.s2.__relabeled__(vmap))
 
+    # As __relabeled__, but using the inverse mapping, "inv", from old vertex numbers to new ones (see Site.__renumbered__).
+    def __renumbered__(self, inv):
+        return Edge(self.s1.__renumbered__(inv), self.s2.__renumbered__(inv))
+
     def getOutgoingSite(self):
         return self.s1
 
@@ -209,20 +257,260 @@ class Edge(object):
 
 ############################################################################################################
 
+#
+# Class for the complementarity table shared by all strand graphs over the same colors
+#
+# - The admissible and toehold edges of a strand graph depend only on its vertex colors (for a given colors_info), so rather than
+#   storing them in every strand graph, they are derived from this table and memoized per tuple of vertex colors.
+# - There is one table per list of strand type objects, obtained via complementarityTableFor.
+# - Both the tables and the edge templates within each table are bounded caches, which drop their least recently used entries
+#   once they are full, and all of the tables are dropped by clearComplementarityTables (e.g., at the start of each enumeration).
+#   Strand graphs keep hold of their own edge templates, so dropping the caches does not affect existing strand graphs.
+# - The admissible (and toehold) edges are always listed in sorted order.
+#
+class ComplementarityTable(object):
+
+    MAX_EDGE_TEMPLATES = 4096
+
+    def __init__(self, colors_info):
+        self.strand_types = [ci['strand_type'] for ci in colors_info] # Holding on to these keeps the key of this table valid
+        self.lengths = [ci['length'] for ci in colors_info]
+        self.domains = [list(ci['strand_type'].domains) for ci in colors_info]
+        self.edge_templates = collections.OrderedDict()
+
+    # Return a tuple (admissible_edges, toehold_edges, admissible_edge_set, toehold_edge_set) for the given vertex colors.
+    # NB: these are shared between strand graphs, so callers must not modify them.
+    def edgeTemplate(self, vertex_colors):
+        key = tuple(vertex_colors)
+        template = self.edge_templates.get(key)
+        if template is None:
+            template = self.__makeEdgeTemplate__(key)
+            self.edge_templates[key] = template
+            if len(self.edge_templates) > self.MAX_EDGE_TEMPLATES:
+                self.edge_templates.popitem(last=False)
+        else:
+            self.edge_templates.move_to_end(key)
+        return template
+
+    def __makeEdgeTemplate__(self, vertex_colors):
+        # Each admissible edge joins a pair of sites with complementary domains. Listing them from the smaller site of each pair,
+        # in site order, gives them in sorted order (and with no duplicates).
+        sites_and_domains = [(Site(vdx, ddx, self.lengths[c]), d)
+                             for (vdx,c) in enumerate(vertex_colors) for (ddx,d) in enumerate(self.domains[c])]
+        sites_by_domain_key = indexSitesByDomainKey(sites_and_domains)
+        admissible_edges = []
+        toehold_edges = []
+        for (s1,d1) in sites_and_domains:
+            for s2 in sites_by_domain_key.get(d1.complementKey(), []):
+                if s1 < s2:
+                    e = Edge(s1, s2)
+                    admissible_edges.append(e)
+                    if d1.istoehold: # NB: complementary domains are either both toeholds or neither
+                        toehold_edges.append(e)
+        return (admissible_edges, toehold_edges, frozenset(admissible_edges), frozenset(toehold_edges))
+
+MAX_COMPLEMENTARITY_TABLES = 64
+
+complementarityTables = collections.OrderedDict()
+
+# Return the complementarity table for the given colors_info (which is shared with any other colors_info with the same strand type objects).
+# The tables are keyed by the identities of the strand types, which each table holds on to, so a key cannot be reused while its table exists.
+def complementarityTableFor(colors_info):
+    key = tuple(id(ci['strand_type']) for ci in colors_info)
+    table = complementarityTables.get(key)
+    if table is None:
+        table = ComplementarityTable(colors_info)
+        complementarityTables[key] = table
+        if len(complementarityTables) > MAX_COMPLEMENTARITY_TABLES:
+            complementarityTables.popitem(last=False)
+    else:
+        complementarityTables.move_to_end(key)
+    return table
+
+def clearComplementarityTables():
+    complementarityTables.clear()
+
+############################################################################################################
+
 #
 # Class for representing strand graphs
 #
+# - Only the vertex colors and the current edges are stored: the admissible and toehold edges are derived from the vertex colors
+#   via the shared complementarity table for the colors_info (see above).
+#
 class StrandGraph(object):
 
-    def __init__(self, colors_info, vertex_colors, admissible_edges, toehold_edges, current_edges, domainLength):
+    def __init__(self, colors_info, vertex_colors, current_edges, domainLength):
+        self.__compactArrays__ = None
         self.colors_info = colors_info
         self.vertex_colors = vertex_colors
-        self.admissible_edges = admissible_edges
-        self.toehold_edges = toehold_edges
         self.current_edges = current_edges
         self.domainLength = domainLength
+        self.__invalidateCaches__()
         # assert self.isValid()
 
+    # The current edges are either stored as a plain list or, once compact() has been called,
+    # as a NumPy array from which the list is decoded whenever it is accessed (see compact below).
+    @property
+    def current_edges(self):
+        if self.__currentEdgeList__ is None:
+            return self.__decodeEdgeArray__(self.__compactArrays__['current_edges'])
+        return self.__currentEdgeList__
+
+    @current_edges.setter
+    def current_edges(self, current_edges):
+        self.__currentEdgeList__ = current_edges
+        self.__dropCompactArray__('current_edges')
+
+    # The vertex colors are either stored as a plain list or, once compact() has been called,
+    # as a NumPy array from which the list is decoded whenever it is accessed (see compact below).
+    @property
+    def vertex_colors(self):
+        if self.__vertexColorList__ is None:
+            return self.__compactArrays__['vertex_colors'].tolist()
+        return self.__vertexColorList__
+
+    @vertex_colors.setter
+    def vertex_colors(self, vertex_colors):
+        self.__vertexColorList__ = vertex_colors
+        self.__dropCompactArray__('vertex_colors')
+
+    # The admissible and toehold edges (in sorted order) are derived from the vertex colors, and shared with all other strand graphs
+    # with the same vertex colors and strand types. NB: callers must not modify the returned lists.
+    @property
+    def admissible_edges(self):
+        return self.__getEdgeTemplate__()[0]
+
+    @property
+    def toehold_edges(self):
+        return self.__getEdgeTemplate__()[1]
+
+    def __getEdgeTemplate__(self):
+        if self.__edgeTemplate__ is None:
+            self.__edgeTemplate__ = complementarityTableFor(self.colors_info).edgeTemplate(self.vertex_colors)
+        return self.__edgeTemplate__
+
+    # Switch this strand graph over to a compact, array-backed representation: the vertex colors are stored as an int32 array,
+    # and the current edges as an int32 array with one (v1, n1, v2, n2) row per edge.
+    # This replaces thousands of small Site and Edge objects with a handful of arrays, which matters for the memory use (and
+    # garbage collection overhead) of large enumerations. The existing methods all keep working, because the lists are decoded
+    # from the arrays on demand, at the cost of doing so on every access. The arrays are the only copy of the edges that is kept:
+    # the adjacency caches and the canonical key are dropped too, and the canonical key is rebuilt from the arrays whenever it is
+    # needed. The hash of the canonical key, the unbound domain signature and the automorphisms are kept, so compacted species can
+    # still be hashed and paired up cheaply.
+    # Compacting requires NumPy. Setting any of the lists again (e.g., by relabeling) switches that list back to a plain list.
+    def compact(self):
+        if not NumpyAvailable:
+            lib.error('NumPy is not available, so strand graphs cannot be compacted!')
+        if self.isCompact():
+            return
+        canonical_hash = self.canonicalHash()
+        self.__compactArrays__ = {'vertex_colors': numpy.array(self.__vertexColorList__, dtype=numpy.int32),
+                                  'current_edges': self.__encodeEdgeList__(self.__currentEdgeList__)}
+        self.__vertexColorList__ = None
+        self.__currentEdgeList__ = None
+        kept = (self.__isCanonical__, self.__unboundDomainSignature__, self.__automorphisms__)
+        self.__invalidateCaches__()
+        (self.__isCanonical__, self.__unboundDomainSignature__, self.__automorphisms__) = kept
+        self.__canonicalHash__ = canonical_hash
+
+    def isCompact(self):
+        return (self.__compactArrays__ is not None) and (len(self.__compactArrays__) == 2)
+
+    def __encodeEdgeList__(self, edges):
+        return numpy.array([(e.s1.v, e.s1.n, e.s2.v, e.s2.n) for e in edges], dtype=numpy.int32).reshape((len(edges), 4))
+
+    # Decode the edges from an edge array, adding offset to every vertex number (see __shiftedCurrentEdges__).
+    def __decodeEdgeArray__(self, arr, offset=0):
+        vertex_colors = self.vertex_colors
+        lengths = [self.colors_info[vc]['length'] for vc in vertex_colors]
+        return [Edge(Site(v1 + offset, n1, lengths[v1]), Site(v2 + offset, n2, lengths[v2])) for (v1, n1, v2, n2) in arr.tolist()]
+
+    # Return the current edges with offset added to every vertex number, as in compose below.
+    # For a compact strand graph, these are decoded straight from the edge array, rather than decoding and then renumbering them.
+    def __shiftedCurrentEdges__(self, offset):
+        if self.__currentEdgeList__ is None:
+            return self.__decodeEdgeArray__(self.__compactArrays__['current_edges'], offset)
+        inv = dict((v, offset+v) for v in self.getVertexNumbers())
+        return [e.__renumbered__(inv) for e in self.__currentEdgeList__]
+
+    # Once one of the lists has been set again, the array that it replaces is no longer needed.
+    def __dropCompactArray__(self, name):
+        if self.__compactArrays__ is not None:
+            self.__compactArrays__.pop(name, None)
+            if len(self.__compactArrays__) == 0:
+                self.__compactArrays__ = None
+
+    # When pickling (e.g., to send species to worker processes), only the underlying data is included, not the cached derived data.
+    def __getstate__(self):
+        return dict((k, self.__dict__[k]) for k in ['colors_info', 'domainLength', '__compactArrays__', '__vertexColorList__',
+                                                    '__currentEdgeList__', '__isCanonical__', '__canonicalKey__', '__canonicalHash__'])
+
+    def __setstate__(self, state):
+        self.__invalidateCaches__()
+        self.__dict__.update(state)
+
+    # Derived data (e.g., sets of edges for fast membership testing) is computed lazily and cached on the strand graph.
+    # Any method that modifies the vertex colors or edge lists in place MUST call this to invalidate those caches.
+    def __invalidateCaches__(self):
+        self.__edgeTemplate__ = None
+        self.__currentEdgeSet__ = None
+        self.__bindingPartners__ = None
+        self.__boundPositions__ = None
+        self.__incidentEdges__ = None
+        self.__vertexPartitions__ = None
+        self.__componentIndex__ = None
+        self.__connectedComponents__ = None
+        self.__rawComponents__ = None
+        self.__canonicalKey__ = None
+        self.__canonicalHash__ = None
+        self.__isCanonical__ = False
+        self.__unboundDomainSignature__ = None
+        self.__automorphisms__ = None
+
+    def admissibleEdgeSet(self):
+        return self.__getEdgeTemplate__()[2]
+
+    def toeholdEdgeSet(self):
+        return self.__getEdgeTemplate__()[3]
+
+    def currentEdgeSet(self):
+        if self.__currentEdgeSet__ is None:
+            self.__currentEdgeSet__ = frozenset(self.current_edges)
+        return self.__currentEdgeSet__
+
+    # Build the adjacency index for the current edges, in a single pass over them:
+    #  * __bindingPartners__ maps each bound site to the site that it is bound to.
+    #  * __boundPositions__ lists, for each vertex, the (sorted) site numbers of its bound sites.
+    #  * __incidentEdges__ lists, for each vertex, the current edges touching it, sorted by the site number on that vertex.
+    def __buildAdjacencyIndex__(self):
+        binding_partners = {}
+        bound_positions = [[] for v in range(self.numVertexes())]
+        incident_edges = [[] for v in range(self.numVertexes())]
+        for e in self.current_edges:
+            binding_partners[e.s1] = e.s2
+            binding_partners[e.s2] = e.s1
+            bound_positions[e.s1.v].append(e.s1.n)
+            bound_positions[e.s2.v].append(e.s2.n)
+            incident_edges[e.s1.v].append((e.s1.n, e))
+            if e.s2.v != e.s1.v:
+                incident_edges[e.s2.v].append((e.s2.n, e))
+        for ns in bound_positions:
+            ns.sort()
+        self.__bindingPartners__ = binding_partners
+        self.__boundPositions__ = bound_positions
+        self.__incidentEdges__ = [[e for (n,e) in sorted(es, key=lambda ne: ne[0])] for es in incident_edges]
+
+    def bindingPartners(self):
+        if self.__bindingPartners__ is None:
+            self.__buildAdjacencyIndex__()
+        return self.__bindingPartners__
+
+    def boundPositions(self, v):
+        if self.__boundPositions__ is None:
+            self.__buildAdjacencyIndex__()
+        return self.__boundPositions__[v]
+
     ####################################################################################################
     #
     # # 
@@ -376,6 +664,29 @@ class StrandGraph(object):
     #             (self.toehold_edges == other.toehold_edges) and
     #             (self.current_edges == other.current_edges))
 
+    # A compact, hashable key for this strand graph: a tuple of the vertex colors and a tuple of (v1,n1,v2,n2) tuples for the current edges.
+    # Since the admissible and toehold edges are determined by the vertex colors (for a given colors_info), two canonical strand
+    # graphs with compatible colors are equal exactly when their keys are equal, and the keys are ordered in the same way as __metric__.
+    # The key is cached, so this should only be used once the strand graph is in its final (e.g., canonical) form.
+    # For a compact strand graph, the key is rebuilt from the arrays each time instead (see compact).
+    def canonicalKey(self):
+        if self.__canonicalKey__ is not None:
+            return self.__canonicalKey__
+        if self.isCompact():
+            return (tuple(self.__compactArrays__['vertex_colors'].tolist()), tuple(map(tuple, self.__compactArrays__['current_edges'].tolist())))
+        self.__canonicalKey__ = (tuple(self.vertex_colors), tuple((e.s1.v, e.s1.n, e.s2.v, e.s2.n) for e in self.current_edges))
+        return self.__canonicalKey__
+
+    # The (cached) hash of the canonical key, which is kept when the strand graph is compacted.
+    def canonicalHash(self):
+        if self.__canonicalHash__ is None:
+            self.__canonicalHash__ = hash(self.canonicalKey())
+        return self.__canonicalHash__
+
+    # Return True if this strand graph has the same canonical key as other, comparing the hashes of the keys first.
+    def sameCanonicalKey(self, other):
+        return (self.canonicalHash() == other.canonicalHash()) and (self.canonicalKey() == other.canonicalKey())
+
     def __eq__(self, other):
         # NB: equality only defined between strand graphs with compatible colors!
         # NB: equality __CURRENTLY__ only defined for connected strand graphs!
@@ -412,10 +723,10 @@ class StrandGraph(object):
     # The vmap can just be the "Visited" list returned from the "enumerateEdges" method below.
     def __relabel__(self, vmap):
         assert lib.distinct([z for z in vmap if z is not None])
+        inv = dict((z,idx) for (idx,z) in enumerate(vmap) if z is not None)
         self.vertex_colors = [self.vertex_colors[vmap[idx]] for idx in range(len(self.vertex_colors))]
-        self.admissible_edges = [e.__relabeled__(vmap) for e in self.admissible_edges]
-        self.toehold_edges = [e.__relabeled__(vmap) for e in self.toehold_edges]
-        self.current_edges = [e.__relabeled__(vmap) for e in self.current_edges]
+        self.current_edges = [e.__renumbered__(inv) for e in self.current_edges]
+        self.__invalidateCaches__()
         # assert self.isValid()
     
     # RETURN A NEW VERSION of this strand graph that is relabeled according to the supplied mapping, "vmap".
@@ -427,66 +738,157 @@ class StrandGraph(object):
     def __relabeled__(self, vmap):
         assert lib.distinct([z for z in vmap if z is not None])
         new_colors_info = list(self.colors_info)
+        inv = dict((z,idx) for (idx,z) in enumerate(vmap) if z is not None)
         new_vertex_colors = [self.vertex_colors[vmap[idx]] for idx in range(len(self.vertex_colors))]
-        new_admissible_edges = [e.__relabeled__(vmap) for e in self.admissible_edges]
-        new_toehold_edges = [e.__relabeled__(vmap) for e in self.toehold_edges]
-        new_current_edges = [e.__relabeled__(vmap) for e in self.current_edges]
-        return StrandGraph(new_colors_info, new_vertex_colors, new_admissible_edges, new_toehold_edges, new_current_edges, self.domainLength)
+        new_current_edges = [e.__renumbered__(inv) for e in self.current_edges]
+        return StrandGraph(new_colors_info, new_vertex_colors, new_current_edges, self.domainLength)
 
     # Relabel and sort the graph into a canonical form to simplify equality checking.
     # See Oury 2013 for more details.
+    #
+    # The canonical relabeling is the one, among the edge enumerations starting from each vertex with the rarest color, whose
+    # relabeled edge enumeration is lexicographically smallest (the first such one wins in the event of a tie).
+    # Rather than computing and relabeling a complete enumeration from every starting vertex, this:
+    #  1. Refines the starting vertexes by their local signature, i.e., the relabeled edges at their own bound positions, which form
+    #     the first block of any enumeration from them. Only the starting vertexes with a minimal signature can win.
+    #  2. Runs the enumeration from each remaining starting vertex incrementally, comparing each relabeled edge against the best
+    #     enumeration found so far as it is produced, and abandoning the enumeration as soon as it is known to be larger.
+    # This returns exactly the same relabeling as comparing the complete enumerations would.
     def __getCanonicalRelabeling__(self):
+        return self.__getCanonicalRelabelings__()[0]
+
+    # Return the list of all relabelings (starting from vertexes with the rarest color) that give the minimal relabeled edge enumeration,
+    # in order of their starting vertexes. The first one is the canonical relabeling; the others differ from it by an automorphism.
+    def __getCanonicalRelabelings__(self):
         assert self.isConnected()
         # First, need to figure out the starting vertex(es)
         # Figure out how many strands there are associated with each color in the strand graph,
         # and find the smallest color with the minimal (but non-zero) number of strands.
-        min_count = float('inf')
-        min_colors = []
-        for c in self.getColorNumbers():
-            this_count = self.vertex_colors.count(c)
-            if this_count > 0: # Don't allow colors with zero occurrences - no vertexes to start from!
-                if this_count < min_count:
-                    min_count = this_count
-                    min_colors = [c]
-                elif this_count == min_count:
-                    min_colors += [c]
-        starting_color = min(min_colors)
-        # Then, compute the edge and vertex enumerations starting from each vertex with the chosen color.
+        color_counts = [0 for c in self.getColorNumbers()]
+        for vc in self.vertex_colors:
+            color_counts[vc] += 1
+        min_count = min(n for n in color_counts if n > 0) # Don't allow colors with zero occurrences - no vertexes to start from!
+        starting_color = color_counts.index(min_count)
         starting_vertexes = [i for (i,vc) in enumerate(self.vertex_colors) if vc == starting_color]
-        enumerations = [self.enumerateEdges(sv) for sv in starting_vertexes]
-        # Finally, compare the resulting enumerations and return a minimal one.
-        enum_min = None
-        alpha_min = None
+        # Refine the starting vertexes by their local signatures, keeping only those with the minimal signature.
+        if len(starting_vertexes) > 1:
+            signatures = [self.__localEnumerationSignature__(sv) for sv in starting_vertexes]
+            min_signature = min(signatures)
+            starting_vertexes = [sv for (sv,sig) in zip(starting_vertexes, signatures) if sig == min_signature]
+        # Then, compute the relabeled edge enumerations from the remaining starting vertexes, with early exit.
         relabeled_enum_min = None
-        # How to compare enumerations: the enumeration is just a list of edges, which have a suitable ordering defined already.
-        # They just need to be relabeled under the corresponding relabeling before testing them for equality?!
-        def relabelEnum(this_enum, this_alpha):
-            return [e.__relabeled__(this_alpha) for e in this_enum]
-        for (enum,alpha) in enumerations:
-            relabeled_enum = relabelEnum(enum, alpha)
-            if enum_min is None:
-                assert alpha_min is None
-                assert relabeled_enum_min is None
-                enum_min = enum
-                alpha_min = alpha
+        alphas_min = []
+        for sv in starting_vertexes:
+            (relabeled_enum, alpha) = self.__relabeledEnumerationFrom__(sv, relabeled_enum_min)
+            if relabeled_enum is None:
+                continue
+            if (relabeled_enum_min is None) or (relabeled_enum < relabeled_enum_min):
                 relabeled_enum_min = relabeled_enum
+                alphas_min = [alpha]
             else:
-                if relabeled_enum < relabeled_enum_min:
-                    enum_min = enum
-                    alpha_min = alpha
-                    relabeled_enum_min = relabeled_enum
-        assert enum_min is not None
-        assert alpha_min is not None
+                assert relabeled_enum == relabeled_enum_min
+                alphas_min += [alpha]
         assert relabeled_enum_min is not None
-        return alpha_min
-
+        return alphas_min
+
+    # Return the (cached) list of automorphisms of this connected strand graph, i.e., the renumberings of its vertexes that map it onto
+    # itself (including the vertex colors), as lists mapping each vertex number to its image. The identity comes first.
+    # Because the strand graph is connected, an automorphism is determined by the image of any one vertex, so the automorphisms are
+    # exactly the ways in which the canonical relabelings tie (provided that the vertex colors match up too).
+    def automorphisms(self):
+        if self.__automorphisms__ is None:
+            alphas = self.__getCanonicalRelabelings__()
+            vertex_colors = self.vertex_colors
+            alpha0 = alphas[0]
+            automorphisms = []
+            for alpha in alphas:
+                if all(vertex_colors[v0] == vertex_colors[v] for (v0,v) in zip(alpha0, alpha)):
+                    perm = [None for v in alpha0]
+                    for (v0,v) in zip(alpha0, alpha):
+                        perm[v0] = v
+                    automorphisms.append(perm)
+            self.__automorphisms__ = automorphisms
+        return self.__automorphisms__
+
+    # Return the automorphisms of self.compose(other) that map self and other onto themselves or (if they are equal) onto each other,
+    # in the same form as automorphisms above.
+    def automorphismsOfComposition(self, other):
+        n = self.numVertexes()
+        automorphisms = [perm1 + [n + v for v in perm2] for perm1 in self.automorphisms() for perm2 in other.automorphisms()]
+        if self.sameCanonicalKey(other):
+            automorphisms += [[(v + n) % (2 * n) for v in perm] for perm in automorphisms] # Swap the two copies over
+        return automorphisms
+
+    # The local signature of vertex v is the first block of the relabeled edge enumeration starting from v, i.e., the relabeled
+    # versions of the edges at v's own bound positions, as (v1,n1,v2,n2) tuples.
+    # Every edge in this block touches the new vertex 0, whereas every later edge in the enumeration does not, so it is always larger.
+    # Hence the sentinel at the end, which ensures that a signature that is a proper prefix of another is treated as the larger one.
+    def __localEnumerationSignature__(self, v):
+        inv = {v:0}
+        signature = []
+        for e in self.getLocallySortedCurrentEdges(v):
+            for vnew in (e.s1.v, e.s2.v):
+                if vnew not in inv:
+                    inv[vnew] = len(inv)
+            signature += [self.__relabeledEdgeTuple__(e, inv)]
+        signature += [(1,)]
+        return signature
+
+    # Return the (v1,n1,v2,n2) tuple for the edge e relabeled according to the inverse mapping, "inv".
+    # This is ordered in the same way as the relabeled Edge object would be.
+    def __relabeledEdgeTuple__(self, e, inv):
+        s1 = (inv[e.s1.v], e.s1.n)
+        s2 = (inv[e.s2.v], e.s2.n)
+        if s2 < s1:
+            (s1, s2) = (s2, s1)
+        return s1 + s2
+
+    # Compute the edge enumeration from the given starting vertex (exactly as enumerateEdges does), relabeled as (v1,n1,v2,n2) tuples,
+    # along with the vertex enumeration (which is the corresponding relabeling, alpha).
+    # If a bound is given, the enumeration is compared against it as it is produced and (None, None) is returned as soon as it
+    # is known to be lexicographically larger than the bound.
+    def __relabeledEnumerationFrom__(self, startVertex, bound=None):
+        relabeled_enum = []
+        Q = collections.deque([startVertex])
+        Visited = [startVertex]
+        inv = {startVertex:0}
+        EnumSet = set()
+        still_equal = bound is not None
+        while Q:
+            v = Q.popleft()
+            for e in self.getLocallySortedCurrentEdges(v):
+                if e not in EnumSet:
+                    EnumSet.add(e)
+                    vnew = e.s1.v if v == e.s2.v else e.s2.v
+                    if vnew not in inv:
+                        inv[vnew] = len(Visited)
+                        Visited += [vnew]
+                        Q.append(vnew)
+                    this_edge = self.__relabeledEdgeTuple__(e, inv)
+                    if still_equal:
+                        bound_edge = bound[len(relabeled_enum)]
+                        if this_edge > bound_edge:
+                            return (None, None)
+                        elif this_edge < bound_edge:
+                            still_equal = False
+                    relabeled_enum += [this_edge]
+        assert len(relabeled_enum) == self.numCurrentEdges()
+        return (relabeled_enum, Visited)
+
+    # NB: this is a no-op if the strand graph is already known to be in canonical form
+    # (the flag is cleared whenever the graph is relabeled, via __invalidateCaches__).
     def __convertToCanonicalForm__(self):
+        if self.__isCanonical__:
+            return
         alpha_min = self.__getCanonicalRelabeling__()
         #print('&&&&&&&&&& canonical alpha = '+str(alpha_min))
         self.__relabel__(alpha_min)
-        self.admissible_edges.sort()
-        self.toehold_edges.sort()
         self.current_edges.sort()
+        self.__invalidateCaches__()
+        self.__isCanonical__ = True
+
+    def isCanonical(self):
+        return self.__isCanonical__
         
     def numVertexes(self):
         return len(self.vertex_colors)
@@ -542,6 +944,8 @@ class StrandGraph(object):
         assert isinstance(other, StrandGraph)
         # assert self.isValid()
         # assert other.isValid()
+        if self.colors_info is other.colors_info:
+            return True
         if len(self.colors_info) != len(other.colors_info):
             debugPrint('Lengths of colors_info lists do not match: '+str(self.colors_info)+' vs '+str(other.colors_info))
             return False
@@ -554,6 +958,18 @@ class StrandGraph(object):
                 return False
         return True
 
+    # Return a copy of this strand graph expressed over a different colors_info, which must include all of the strand types used here.
+    # NB: the vertex colors are renumbered, so the copy is not (necessarily) in canonical form.
+    def recolored(self, colors_info):
+        color_map = []
+        for ci in self.colors_info:
+            matches = [idx for (idx,new_ci) in enumerate(colors_info) if new_ci['strand_type'] == ci['strand_type']]
+            if matches == []:
+                lib.error('In StrandGraph.recolored: strand type '+str(ci['strand_type'])+' not found in '+str(colors_info))
+            color_map.append(matches[0])
+        new_vertex_colors = [color_map[c] for c in self.vertex_colors]
+        return StrandGraph(colors_info, new_vertex_colors, list(self.current_edges), self.domainLength)
+
     def getExternalEdgesFromVertexes(self, vdxs):
         res = []
         for e in self.current_edges:
@@ -562,51 +978,99 @@ class StrandGraph(object):
                 res += [e]
         return res
 
+    # Compute the connected components of this strand graph, as a partition of its vertexes,
+    # using union-find over the current edges (near-linear in the size of the graph).
+    # The partitions are listed in order of their smallest vertex, and the vertexes within each partition are sorted.
+    # The result is cached, along with the index of the partition that each vertex belongs to.
+    def __computeVertexPartitions__(self):
+        parent = list(range(self.numVertexes()))
+        def find(v):
+            while parent[v] != v:
+                parent[v] = parent[parent[v]] # Path halving
+                v = parent[v]
+            return v
+        for e in self.current_edges:
+            r1 = find(e.s1.v)
+            r2 = find(e.s2.v)
+            if r1 < r2:
+                parent[r2] = r1
+            elif r2 < r1:
+                parent[r1] = r2
+        vertex_partitions = []
+        component_index = []
+        partition_of_root = {}
+        for v in range(self.numVertexes()):
+            r = find(v)
+            if r not in partition_of_root:
+                partition_of_root[r] = len(vertex_partitions)
+                vertex_partitions.append([])
+            vertex_partitions[partition_of_root[r]].append(v)
+            component_index.append(partition_of_root[r])
+        self.__vertexPartitions__ = vertex_partitions
+        self.__componentIndex__ = component_index
+
     def __makeVertexPartitions__(self):
-        def tryToMergeVertexPartitions(vertex_partitions):
-            for (idx,p1) in enumerate(vertex_partitions):
-                for (jdx,p2) in enumerate(vertex_partitions):
-                    if idx <= jdx:
-                        pass
-                    else:
-                        for e in self.current_edges:
-                            if ((e.s1.v in vertex_partitions[idx] and e.s2.v in vertex_partitions[jdx]) or
-                                (e.s2.v in vertex_partitions[idx] and e.s1.v in vertex_partitions[jdx])):
-                                return lib.mergeInnerLists(vertex_partitions, [idx, jdx])
-            return None
-        vertex_partitions = lib.explode(self.getVertexNumbers())
-        while True:
-            new_vertex_partitions = tryToMergeVertexPartitions(vertex_partitions)
-            if new_vertex_partitions is None:
-                break
-            else:
-                vertex_partitions = new_vertex_partitions
-        return vertex_partitions
+        if self.__vertexPartitions__ is None:
+            self.__computeVertexPartitions__()
+        return [list(vs) for vs in self.__vertexPartitions__]
+
+    # Return a list giving the index of the connected component (in the __makeVertexPartitions__ ordering) of each vertex.
+    def componentIndex(self):
+        if self.__componentIndex__ is None:
+            self.__computeVertexPartitions__()
+        return self.__componentIndex__
 
     def isConnected(self):
-        return len(self.__makeVertexPartitions__()) == 1
+        if self.__vertexPartitions__ is None:
+            self.__computeVertexPartitions__()
+        return len(self.__vertexPartitions__) == 1
     
+    # NB: the components are computed once and cached, so callers must not modify the returned strand graphs in place.
     def connectedComponents(self):
-        def filterConvertAndMaybeCheckEdges(edges, vs, doCheck):
-            res = []
-            for e in edges:
-                if ((e.s1.v in vs) and (e.s2.v in vs)):
-                    res += [e.__relabeled__(vs)]
-                else:
-                    if doCheck: # Make sure that edge is completely inside or completely outside the component, if doCheck is True...
-                        assert ((e.s1.v not in vs) and (e.s2.v not in vs))
-            return res
-        def makeStrandGraphFromVertexPartition(vs):
-            new_vertex_colors = [self.vertex_colors[v] for v in vs]
-            new_admissible_edges = filterConvertAndMaybeCheckEdges(self.admissible_edges, vs, False)
-            new_toehold_edges = filterConvertAndMaybeCheckEdges(self.toehold_edges, vs, False)
-            new_current_edges = filterConvertAndMaybeCheckEdges(self.current_edges, vs, True)
-
-            new_sg = StrandGraph(self.colors_info, new_vertex_colors, new_admissible_edges, new_toehold_edges, new_current_edges, self.domainLength)
+        return [self.connectedComponent(cdx) for cdx in range(self.numConnectedComponents())]
+
+    def numConnectedComponents(self):
+        if self.__vertexPartitions__ is None:
+            self.__computeVertexPartitions__()
+        return len(self.__vertexPartitions__)
+
+    # Return the connected component with the given index (in the __makeVertexPartitions__ ordering), as a strand graph in canonical form.
+    # Each component is only converted into canonical form when it is first requested.
+    def connectedComponent(self, cdx):
+        if self.__connectedComponents__ is None:
+            self.__connectedComponents__ = [None] * self.numConnectedComponents()
+        if self.__connectedComponents__[cdx] is None:
+            (new_vertex_colors, new_current_edges) = self.__rawComponentParts__()[cdx]
+            new_sg = StrandGraph(self.colors_info, list(new_vertex_colors), list(new_current_edges), self.domainLength)
             assert new_sg.isConnected()
             new_sg.__convertToCanonicalForm__()
-            return new_sg
-        return [makeStrandGraphFromVertexPartition(vs) for vs in self.__makeVertexPartitions__()]
+            self.__connectedComponents__[cdx] = new_sg
+        return self.__connectedComponents__[cdx]
+
+    # Return a cheap, hashable key for each connected component, computed without converting the components into canonical form.
+    # Equal keys mean that the components are identical as labeled graphs (so they are the same species), but the converse
+    # need not hold, so these keys are only useful for recognising components that have been seen before in the same labeling.
+    def rawComponentKeys(self):
+        return [(tuple(vcs), tuple(sorted((e.s1.v, e.s1.n, e.s2.v, e.s2.n) for e in es))) for (vcs, es) in self.__rawComponentParts__()]
+
+    # Split the vertex colors and current edges into a (vertex_colors, current_edges) pair for each connected component,
+    # with the vertexes of each component renumbered in order, in a single pass over the current edges.
+    def __rawComponentParts__(self):
+        if self.__rawComponents__ is None:
+            component_index = self.componentIndex()
+            partitions = self.__makeVertexPartitions__()
+            vmap = [None] * self.numVertexes() # Maps old vertex numbers to new ones within their component
+            for vs in partitions:
+                for (idx,v) in enumerate(vs):
+                    vmap[v] = idx
+            vertex_colors = self.vertex_colors
+            parts = [([vertex_colors[v] for v in vs], []) for vs in partitions]
+            for e in self.current_edges:
+                cdx = component_index[e.s1.v]
+                assert component_index[e.s2.v] == cdx # Edges must lie completely inside a component
+                parts[cdx][1].append(Edge(Site(vmap[e.s1.v], e.s1.n, e.s1.nmax), Site(vmap[e.s2.v], e.s2.n, e.s2.nmax)))
+            self.__rawComponents__ = parts
+        return self.__rawComponents__
 
     # def connectedComponents_another(self):
     #     def filterConvertAndMaybeCheckEdges(edges, vs, doCheck):
@@ -632,23 +1096,10 @@ class StrandGraph(object):
 
     def compose(self, other):
         assert self.compatibleColors(other)
-        vmap = ([None] * self.numVertexes()) + list(other.getVertexNumbers())
+        # The vertexes of other are renumbered to follow on from those of self
         new_vertex_colors = list(self.vertex_colors) + list(other.vertex_colors)
-        extra_admissible_edges = []
-        extra_toehold_edges = []
-        for s1 in self.getSites():
-            d1 = self.getDomain(s1)
-            for s2 in other.getSites():
-                d2 = other.getDomain(s2)
-                if d1.isComplementaryTo(d2):
-                    new_edge = Edge(s1, s2.__relabeled__(vmap))
-                    extra_admissible_edges += [new_edge]
-                    if d1.istoehold and d2.istoehold:
-                        extra_toehold_edges += [new_edge]
-        new_admissible_edges = list(self.admissible_edges) + [e.__relabeled__(vmap) for e in other.admissible_edges] + extra_admissible_edges
-        new_toehold_edges = list(self.toehold_edges) + [e.__relabeled__(vmap) for e in other.toehold_edges] + extra_toehold_edges
-        new_current_edges = list(self.current_edges) + [e.__relabeled__(vmap) for e in other.current_edges]
-        new_sg = StrandGraph(self.colors_info, new_vertex_colors, new_admissible_edges, new_toehold_edges, new_current_edges, self.domainLength)
+        new_current_edges = list(self.current_edges) + other.__shiftedCurrentEdges__(self.numVertexes())
+        new_sg = StrandGraph(self.colors_info, new_vertex_colors, new_current_edges, self.domainLength)
         return new_sg
 
     # def getOutEdges(self, v):
@@ -671,19 +1122,10 @@ class StrandGraph(object):
     # They are ordered based on the site number that they join to (into / out of, doesn't matter)
     # on the specified vertex v.
     def getLocallySortedCurrentEdges(self, v):
-        assert v in self.getVertexNumbers()
-        edges = []
-        for e in self.current_edges:
-            if e.s1.v == v or e.s2.v == v:
-                edges += [e]
-        def sortingKey(e):
-            if e.s1.v == v:
-                return e.s1.n
-            elif e.s2.v == v:
-                return e.s2.n
-            else:
-                assert False
-        return sorted(edges, key=sortingKey)
+        assert 0 <= v < self.numVertexes()
+        if self.__incidentEdges__ is None:
+            self.__buildAdjacencyIndex__()
+        return list(self.__incidentEdges__[v])
 
     # # Edges are assigned colors by lifting the colors of vertexes.
     # # By convention, we use the color of the "out" vertex (i.e., the smaller site).
@@ -698,8 +1140,10 @@ class StrandGraph(object):
         assert self.isConnected()
         assert startVertex in self.getVertexNumbers()
         Enum = []
+        EnumSet = set()
         Q = [startVertex]
         Visited = [startVertex]
+        VisitedSet = {startVertex}
         while Q != []:
             v = Q.pop(0)
             ############################################################################################################
@@ -718,63 +1162,88 @@ class StrandGraph(object):
             edges = self.getLocallySortedCurrentEdges(v)
             ############################################################################################################
             for e in edges:
-                if e not in Enum:
+                if e not in EnumSet:
                     Enum += [e]
+                    EnumSet.add(e)
                     if v == e.s2.v:
                         vnew = e.s1.v
                     elif v == e.s1.v:
                         vnew = e.s2.v
                     else:
                         assert False
-                    if vnew not in Visited:
+                    if vnew not in VisitedSet:
                         Visited += [vnew]
+                        VisitedSet.add(vnew)
                         Q += [vnew]
         assert len(Enum) == self.numCurrentEdges()
-        assert lib.distinct(Enum)
+        assert len(EnumSet) == len(Enum)
         #print('&&&&& Enum = '+str(Enum))
         #print('&&&&& Visited = '+str(Visited))
         return (Enum, Visited) # Enum is ordering on edges, Visited is ordering on vertexes -> "vertex alpha-renaming" from the Oury paper.
 
     def siteIsBound(self, s):
-        assert s in self.getSites()
-        for e in self.current_edges:
-            if s in [e.s1, e.s2]:
-                return True
-        return False
+        assert 0 <= s.v < self.numVertexes()
+        assert 0 <= s.n < self.colors_info[self.vertex_colors[s.v]]['length']
+        return s in self.bindingPartners()
 
     def currentlyUnboundSites(self):
-        unboundSites = self.getSites()
-        for s in self.currentlyBoundSites():
-            unboundSites.remove(s)
-        return unboundSites
+        binding_partners = self.bindingPartners()
+        return [s for s in self.getSites() if s not in binding_partners]
     
+    # Return a dictionary mapping each domain key (see Domain.key) to the list of currently unbound sites with that domain, in site order.
+    def unboundSitesByDomainKey(self):
+        return indexSitesByDomainKey([(s, self.getDomain(s)) for s in self.currentlyUnboundSites()])
+
     def currentlyBoundSites(self):
-        currently_bound_sites = []
-        for e in self.current_edges:
-            currently_bound_sites += [e.s1, e.s2] ## Don't need to check for duplicates here...
-        return currently_bound_sites
+        return list(self.bindingPartners()) ## Ordered as in the current edges list, i.e., [e.s1, e.s2] for each edge e
+
+    # Return a (cached) triple (domain_keys, complement_keys, internal), where domain_keys is the set of keys (see Domain.key) of the
+    # domains at the currently unbound sites, complement_keys is the set of keys of their complements, and internal is True iff some
+    # pair of currently unbound sites could bind to each other. So this strand graph, composed with another one, can only have a new
+    # edge if either of them is internal or if they have an unbound domain and its complement between them (see mayBindWith).
+    def unboundDomainSignature(self):
+        if self.__unboundDomainSignature__ is None:
+            binding_partners = self.bindingPartners()
+            domains = [self.getDomain(s) for s in self.getSites() if s not in binding_partners]
+            internal = any((e.s1 not in binding_partners) and (e.s2 not in binding_partners) for e in self.admissible_edges)
+            self.__unboundDomainSignature__ = (frozenset(d.key() for d in domains), frozenset(d.complementKey() for d in domains), internal)
+        return self.__unboundDomainSignature__
+
+    # Return False if composing this strand graph with other could not produce any possible new edges.
+    def mayBindWith(self, other):
+        (keys, complement_keys, internal) = self.unboundDomainSignature()
+        (other_keys, other_complement_keys, other_internal) = other.unboundDomainSignature()
+        return internal or other_internal or not keys.isdisjoint(other_complement_keys)
 
     def possibleNewEdges(self):
+        current_edge_set = self.currentEdgeSet()
         possible_new_edges = []
         for e in self.admissible_edges:
-            if e not in self.current_edges:
+            if e not in current_edge_set:
                 possible_new_edges.append(e)
         return possible_new_edges
 
     def addEdgeToCurrentEdges(self, e):
-        assert e in self.admissible_edges
-        new_current_edges = list(self.current_edges) + [e]
-        return StrandGraph(self.colors_info, self.vertex_colors, self.admissible_edges, self.toehold_edges, new_current_edges,self.domainLength)
+        assert e in self.admissibleEdgeSet()
+        return self.withCurrentEdgeChanges([e], [])
 
     def removeEdgeFromCurrentEdges(self, e):
-        assert e in self.admissible_edges
-        assert e in self.current_edges
-        new_current_edges = []
-        for ce in self.current_edges:
-            if ce != e:
-                new_current_edges.append(ce)
-        assert len(new_current_edges) == (len(self.current_edges) - 1)
-        return StrandGraph(self.colors_info, self.vertex_colors, self.admissible_edges, self.toehold_edges, new_current_edges, self.domainLength)
+        assert e in self.admissibleEdgeSet()
+        assert e in self.currentEdgeSet()
+        return self.withCurrentEdgeChanges([], [e])
+
+    # Return a new strand graph whose current edges are those of this one, with edges_removed taken out and then edges_added appended
+    # (in order), building the new edge list in one pass. This gives the same strand graph as a chain of removeEdgeFromCurrentEdges
+    # and addEdgeToCurrentEdges calls, without the intermediate strand graphs and edge lists.
+    def withCurrentEdgeChanges(self, edges_added, edges_removed):
+        assert all(e in self.admissibleEdgeSet() for e in edges_added)
+        edges_removed = set(edges_removed)
+        new_current_edges = [e for e in self.current_edges if e not in edges_removed] + list(edges_added)
+        assert len(new_current_edges) == len(self.current_edges) - len(edges_removed) + len(edges_added)
+        new_sg = StrandGraph(self.colors_info, self.vertex_colors, new_current_edges, self.domainLength)
+        # The vertex colors are the same as for this strand graph, so the edge template can be shared too.
+        new_sg.__edgeTemplate__ = self.__getEdgeTemplate__()
+        return new_sg
 
     def possibleAdjacentEdges(self, e):
         s1_5pr = e.s1.fivePrimeAdjacentSite()
@@ -786,35 +1255,35 @@ class StrandGraph(object):
             edges_to_check.append(Edge(s1_5pr, s2_3pr))
         if s1_3pr is not None and s2_5pr is not None:
             edges_to_check.append(Edge(s1_3pr, s2_5pr))
+        admissible_edge_set = self.admissibleEdgeSet()
         res = []
         for new_edge in edges_to_check:
-            if new_edge in self.admissible_edges:
+            if new_edge in admissible_edge_set:
                 res.append(new_edge)
         return res
 
     def has_adjacent(self, e):
-        assert e in self.admissible_edges
+        assert e in self.admissibleEdgeSet()
         adjacent_possibilities = self.possibleAdjacentEdges(e)
+        current_edge_set = self.currentEdgeSet()
         for poss_edge in adjacent_possibilities:
-            if poss_edge in self.current_edges:
+            if poss_edge in current_edge_set:
                 return True
         return False
 
     def getBindingPartner(self, s):
-        for e in self.current_edges:
-            if e.s1 == s:
-                return e.s2
-            elif e.s2 == s:
-                return e.s1
-        return None
+        return self.bindingPartners().get(s)
 
     # Find bound sites on same vertex as a given site.
     # For convenience later on, we also split these out depending on
     # whether they are located toward the 5' or 3' end from the specified site.
+    # These only look at the bound positions on the vertex in question, via the adjacency index.
     def boundSitesFivePrimeFrom(self, s):
-        return [r for r in s.allFivePrimeSites() if self.siteIsBound(r)]
+        ns = self.boundPositions(s.v)
+        return [Site(s.v, n, s.nmax) for n in ns[:bisect.bisect_left(ns, s.n)]]
     def boundSitesThreePrimeFrom(self, s):
-        return [r for r in s.allThreePrimeSites() if self.siteIsBound(r)]
+        ns = self.boundPositions(s.v)
+        return [Site(s.v, n, s.nmax) for n in ns[bisect.bisect_right(ns, s.n):]]
     def boundSitesOnSameVertexAs(self, s):
         return self.boundSitesFivePrimeFrom(s) + self.boundSitesThreePrimeFrom(s)
 
@@ -907,7 +1376,7 @@ class StrandGraph(object):
         for e in self.current_edges:
             thisStyle = 'dashed'
             #thisColor = 'black:black' if e in self.toehold_edges else 'black:black'
-            thisColor = 'lightgrey' if e in self.toehold_edges else 'grey'
+            thisColor = 'lightgrey' if e in self.toeholdEdgeSet() else 'grey'
             d.edge(str(e.s1), str(e.s2), dir='none', color=thisColor, style=thisStyle, len='0.75')
         return d
     
@@ -926,17 +1395,14 @@ class StrandGraph(object):
             print(self)
 
     def sameSpecies(self, s1, s2):
-        vertex_list = self.__makeVertexPartitions__()
-        for vertex in vertex_list:
-            if(s1.v in vertex and s2.v in vertex):
-                return True
-        return False
+        component_index = self.componentIndex()
+        return component_index[s1.v] == component_index[s2.v]
 
 
 ############################################################################################################
 
 def makeEmptyStrandGraph(colors_info):
-    return StrandGraph(colors_info, [], [], [], [], {})
+    return StrandGraph(colors_info, [], [], {})
 
 ############################################################################################################
 
@@ -960,22 +1426,7 @@ def strandGraphComponentsFromProcess(p):
         assert color_idx is not None
         return color_idx
     vertex_colors = [findColor(s.strandType(), colors_info) for s in p.strands]
-    admissible_edges = []
-    for (vdx1,c1) in enumerate(vertex_colors):
-        for (ddx1,d1) in enumerate(p.strands[vdx1].domains):
-            for (vdx2,c2) in enumerate(vertex_colors):
-                for (ddx2,d2) in enumerate(p.strands[vdx2].domains):
-                    if d1.stripBond().isComplementaryTo(d2.stripBond()):
-                        this_edge = Edge(Site(vdx1, ddx1, colors_info[c1]['length']),
-                                         Site(vdx2, ddx2, colors_info[c2]['length']))
-                        if this_edge not in admissible_edges:
-                            admissible_edges.append(this_edge)
-    toehold_edges = []
-    for e in admissible_edges:
-        d1 = p.strands[e.s1.v].domains[e.s1.n]
-        d2 = p.strands[e.s2.v].domains[e.s2.n]
-        if d1.istoehold and d2.istoehold:
-            toehold_edges.append(e)
+    (admissible_edges, toehold_edges, admissible_edge_set, toehold_edge_set) = complementarityTableFor(colors_info).edgeTemplate(vertex_colors)
     current_edges = []
     for e in admissible_edges:
         d1 = p.strands[e.s1.v].domains[e.s1.n]
@@ -983,13 +1434,39 @@ def strandGraphComponentsFromProcess(p):
         if d1.wellFormedBondTo(d2):
             current_edges.append(e)
     domainLength = {}
-    return (colors_info, vertex_colors, admissible_edges, toehold_edges, current_edges, domainLength)
+    return (colors_info, vertex_colors, current_edges, domainLength)
+
+# Given a list of (site, domain) pairs, return a dictionary mapping each domain key (see Domain.key) to the list of sites with that domain,
+# in the same order as they appear in the input list.
+def indexSitesByDomainKey(sites_and_domains):
+    sites_by_domain_key = {}
+    for (s,d) in sites_and_domains:
+        sites_by_domain_key.setdefault(d.key(), []).append(s)
+    return sites_by_domain_key
+
+# Merge several colors_info lists into one that includes all of their strand types,
+# ordered in the same (canonical) way as for a strand graph created from a process.
+def mergeColorsInfo(colors_infos):
+    merged = []
+    for colors_info in colors_infos:
+        for ci in colors_info:
+            if ci['strand_type'] not in [d['strand_type'] for d in merged]:
+                merged.append({'strand_type':ci['strand_type'], 'length':ci['length']})
+    merged.sort(key=lambda d: d['strand_type'])
+    return merged
+
+# Rebuild a strand graph from its canonical key (see StrandGraph.canonicalKey) and colors_info.
+def strandGraphFromCanonicalKey(colors_info, key, domainLength={}):
+    (vertex_colors, edge_tuples) = key
+    lengths = [colors_info[c]['length'] for c in vertex_colors]
+    current_edges = [Edge(Site(v1, n1, lengths[v1]), Site(v2, n2, lengths[v2])) for (v1, n1, v2, n2) in edge_tuples]
+    return StrandGraph(colors_info, list(vertex_colors), current_edges, domainLength)
 
 def strandGraphFromProcess(p):
     assert isinstance(p, Process)
     assert p.wellFormed()
-    (colors_info, vertex_colors, admissible_edges, toehold_edges, current_edges, domainLength) = strandGraphComponentsFromProcess(p)
-    return StrandGraph(colors_info, vertex_colors, admissible_edges, toehold_edges, current_edges, domainLength)
+    (colors_info, vertex_colors, current_edges, domainLength) = strandGraphComponentsFromProcess(p)
+    return StrandGraph(colors_info, vertex_colors, current_edges, domainLength)
 
 def connectedStrandGraphsFromProcess(p):
     assert isinstance(p, Process)
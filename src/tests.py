@@ -23,6 +23,7 @@
 ########################################################################
 
 import math
+import multiprocessing
 import sgparser
 import sys
 from constants import *
@@ -36,6 +37,7 @@ from reaction import *
 from enumerator_geometric import *
 from crn import *
 from constraintchecker_sampling import *
+from scheduler_priority import *
 
 
 class Skipping(Exception):
@@ -45,6 +47,12 @@ def skip():
     print('Skipping...')
     raise Skipping
 
+# Worker processes that are not forked import this module afresh, which runs all of the tests again, so the tests that use
+# worker processes are skipped unless they are forked.
+def skipUnlessForking():
+    if multiprocessing.get_start_method() != 'fork':
+        skip()
+
 def zero_nucteotide_loop_check(s):
     s1 = [(i.strip()) for i in (s[1:-1] + "").split('|')]
     res = ""
@@ -446,6 +454,197 @@ def test_zero_nucleotide_loops():
     domainLengthStr = 'toeholdDomain t length 14 longDomain spcr1 length 10 longDomain y length 20'
     doParsingAndEnumerationTest(s, 4, domainLengthStr)        
 
+# Helpers for the tests below, which compare CRNs enumerated in different ways.
+def speciesListFor(s, domainLengthStr):
+    speciesList = speciesListFromProcess(sgparser.parse(s))
+    for spec in speciesList:
+        spec.domainLength = parseDomainLength(domainLengthStr)
+    return speciesList
+
+def crnSummary(crn):
+    species = sorted(sp.printAsProcess() for sp in crn.species)
+    reactions = sorted((tuple(sp.printAsProcess() for sp in r.reactants), r.fwdrate, r.bwdrate, tuple(sp.printAsProcess() for sp in r.products))
+                       for r in crn.reactions)
+    return (species, reactions)
+
+# An enumerator with the default settings, except for the given ones, and an order-independent constraint checker (unless one is given),
+# so that the results do not depend on the order of the plausibility checks.
+def orderIndependentEnumerator(**overrides):
+    settings = dict(enumeratorGeometric.settings)
+    settings['constraintChecker'] = ConstraintChecker_Sampling(seed=7, orderIndependent=True)
+    settings.update(overrides)
+    return ReactionEnumerator_Geometric(settings)
+
+# The systems used by the tests below (the larger one is the same as in test003).
+SMALL_SYSTEM = '(<t^* x*!i1> | <x!i1> | <x t^>)'
+SMALL_SYSTEM_DOMAIN_LENGTHS = 'toeholdDomain t length 5 longDomain x length 20'
+LARGER_SYSTEM = '( <L T2^!i2 X*!i1 T1^> | <A X!i1 T2^*!i2> | <T1^* X*!j1 R> | < X!j1 A!j2 > | <A*!j2 > )'
+LARGER_SYSTEM_DOMAIN_LENGTHS = 'longDomain L length 20 toeholdDomain T2 length 5 longDomain X length 20 toeholdDomain T1 length 5 longDomain A length 20 longDomain R length 20'
+
+def smallSystem():
+    return speciesListFor(SMALL_SYSTEM, SMALL_SYSTEM_DOMAIN_LENGTHS)
+
+def largerSystem():
+    return speciesListFor(LARGER_SYSTEM, LARGER_SYSTEM_DOMAIN_LENGTHS)
+
+def test_deferred_plausibility():
+    enumerator = orderIndependentEnumerator()
+    crn_inline = enumerator.enumerateReactions(smallSystem())
+    enumerator.settings['deferredPlausibility'] = True
+    crn_deferred = enumerator.enumerateReactions(smallSystem())
+    print('Deferred enumeration: '+str(len(crn_deferred.species))+' species and '+str(len(crn_deferred.reactions))+' reactions.')
+    assert crnSummary(crn_deferred) == crnSummary(crn_inline)
+    print('Deferred enumeration matches inline enumeration: True')
+    # The checker may check the deferred batches in its own worker processes, which it shuts down when the enumeration finishes
+    skipUnlessForking()
+    checker = ConstraintChecker_Sampling(seed=7, orderIndependent=True, workers=2)
+    enumerator.settings['constraintChecker'] = checker
+    crn_deferred_parallel = enumerator.enumerateReactions(smallSystem())
+    assert crnSummary(crn_deferred_parallel) == crnSummary(crn_inline)
+    assert checker.pool is None
+    print('Deferred enumeration with checker workers matches inline enumeration: True')
+
+# Enumerating a system in two steps (first some of the strands, then the rest, via enumerateReactionsFrom) should give the same CRN as
+# enumerating it all at once. This needs an order-independent constraint checker, so that plausibility does not depend on the order of checks.
+def test_incremental_enumeration():
+    s_first = '(<t^* x*!i1> | <x!i1>)'
+    s_second = '(<x t^>)'
+    enumerator = orderIndependentEnumerator()
+    crn_all = enumerator.enumerateReactions(smallSystem())
+    crn_first = enumerator.enumerateReactions(speciesListFor(s_first, SMALL_SYSTEM_DOMAIN_LENGTHS))
+    crn_incremental = enumerator.enumerateReactionsFrom(crn_first, speciesListFor(s_second, SMALL_SYSTEM_DOMAIN_LENGTHS))
+    print('Full enumeration: '+str(len(crn_all.species))+' species and '+str(len(crn_all.reactions))+' reactions.')
+    print('Incremental enumeration: '+str(len(crn_incremental.species))+' species and '+str(len(crn_incremental.reactions))+' reactions.')
+    assert crnSummary(crn_incremental) == crnSummary(crn_all)
+    print('Incremental enumeration matches full enumeration: True')
+
+# The event stream from iterEnumerateReactions should yield each species once, before any reaction that involves it,
+# and its processed species and reactions should make up the same CRN as enumerateReactions returns.
+def test_enumeration_events():
+    enumerator = orderIndependentEnumerator()
+    crn = enumerator.enumerateReactions(smallSystem())
+    discovered = []
+    processed = []
+    reactions = []
+    for event in enumerator.iterEnumerateReactions(smallSystem()):
+        if event['event'] == 'species':
+            assert event['species'] not in discovered
+            discovered.append(event['species'])
+        elif event['event'] == 'processed':
+            assert event['species'] in discovered
+            processed.append(event['species'])
+        elif event['event'] == 'reaction':
+            assert all(sp in discovered for sp in event['reaction'].listOfSpeciesInvolved())
+            reactions.append(event['reaction'])
+        else:
+            assert False
+    print('Event stream: '+str(len(discovered))+' species discovered, '+str(len(processed))+' processed, and '+str(len(reactions))+' reactions.')
+    assert crnSummary(CRN(processed, reactions)) == crnSummary(crn)
+    print('Event stream matches enumerateReactions: True')
+
+# Compacting the processed species should not change the CRN, and the reactions should share the compacted species instances.
+def test_compact_species():
+    if not NumpyAvailable:
+        skip()
+    enumerator = orderIndependentEnumerator()
+    crn = enumerator.enumerateReactions(smallSystem())
+    enumerator.settings['compactSpecies'] = True
+    crn_compact = enumerator.enumerateReactions(smallSystem())
+    assert crnSummary(crn_compact) == crnSummary(crn)
+    assert all(sp.isCompact() for r in crn_compact.reactions for sp in r.listOfSpeciesInvolved())
+    print('Enumeration with compact species matches enumeration without: True')
+
+# Computing the bimolecular reactions in worker processes should give the same CRN as computing them sequentially.
+def test_parallel_enumeration():
+    skipUnlessForking()
+    enumerator = orderIndependentEnumerator()
+    crn_sequential = enumerator.enumerateReactions(largerSystem())
+    enumerator.settings['workers'] = 2
+    crn_parallel = enumerator.enumerateReactions(largerSystem())
+    print('Parallel enumeration: '+str(len(crn_parallel.species))+' species and '+str(len(crn_parallel.reactions))+' reactions.')
+    assert crnSummary(crn_parallel) == crnSummary(crn_sequential)
+    print('Parallel enumeration matches sequential enumeration: True')
+
+# Processing the species in level-synchronous waves, with or without worker processes, should give the same CRN as the usual
+# sequential algorithm.
+def test_wave_enumeration():
+    enumerator = orderIndependentEnumerator()
+    crn_sequential = enumerator.enumerateReactions(largerSystem())
+    enumerator.settings['waveMode'] = True
+    crn_wave = enumerator.enumerateReactions(largerSystem())
+    print('Wave enumeration: '+str(len(crn_wave.species))+' species and '+str(len(crn_wave.reactions))+' reactions.')
+    assert crnSummary(crn_wave) == crnSummary(crn_sequential)
+    print('Wave enumeration matches sequential enumeration: True')
+    skipUnlessForking()
+    enumerator.settings['workers'] = 2
+    crn_wave_parallel = enumerator.enumerateReactions(largerSystem())
+    assert crnSummary(crn_wave_parallel) == crnSummary(crn_sequential)
+    print('Parallel wave enumeration matches sequential enumeration: True')
+
+# Pruning the transitions of a symmetric (C2) complex by orbits should give the same CRN as generating them all, with each of
+# the equivalent unbindings of a toehold recorded once with multiplicity 2. Only the input is expanded (maxDepth=1).
+def test_symmetry_reduction():
+    domainLengthStr = 'toeholdDomain t length 5 longDomain a length 20 longDomain b length 20 longDomain x length 20'
+    s = '(<a!i1 t^!i5 x b!i2> | <b*!i2 x a*!i3> | <a!i3 t^!i6 x b!i4> | <b*!i4 x a*!i1> | <t^*!i5> | <t^*!i6>)'
+    enumerator = orderIndependentEnumerator(scheduler=Scheduler_FIFO(maxDepth=1))
+    crn_reduced = enumerator.enumerateReactions(speciesListFor(s, domainLengthStr))
+    enumerator.settings['symmetryReduction'] = False
+    crn_full = enumerator.enumerateReactions(speciesListFor(s, domainLengthStr))
+    print('Symmetry reduction: '+str(len(crn_reduced.species))+' species and '+str(len(crn_reduced.reactions))+' reactions.')
+    assert crnSummary(crn_reduced) == crnSummary(crn_full)
+    print('Symmetry reduction matches full enumeration: True')
+    assert any(r.metadata.get('multiplicity') == 2 for r in crn_reduced.reactions)
+    assert all(r.metadata.get('multiplicity') == 1 for r in crn_full.reactions)
+    print('Multiplicities: '+str(sorted(r.metadata.get('multiplicity') for r in crn_reduced.reactions)))
+
+def test_budgeted_enumeration():
+    enumerator = orderIndependentEnumerator()
+    crn_all = enumerator.enumerateReactions(smallSystem())
+    enumerator.settings['maxSpecies'] = 2
+    crn_partial = enumerator.enumerateReactions(smallSystem())
+    assert enumerator.exhausted_budget == 'maxSpecies'
+    print('Budget exhausted: '+str(enumerator.exhausted_budget))
+    print('Partial enumeration: '+str(len(crn_partial.species))+' species ('+str(len(crn_partial.unexpanded_species))+' unexpanded) and '+str(len(crn_partial.reactions))+' reactions.')
+    enumerator.settings['maxSpecies'] = math.inf
+    crn_resumed = enumerator.enumerateReactionsFrom(crn_partial, [])
+    print('Resumed enumeration: '+str(len(crn_resumed.species))+' species ('+str(len(crn_resumed.unexpanded_species))+' unexpanded) and '+str(len(crn_resumed.reactions))+' reactions.')
+    assert crnSummary(crn_resumed) == crnSummary(crn_all)
+    print('Resumed enumeration matches full enumeration: True')
+    # A partial CRN can also be resumed with new species that bring new strand types, in which case its species (including the
+    # unexpanded ones) are recolored before they are compared with the new species
+    for (maxSpecies, s_new, domainLengthStr_new) in [(2, '(<t^>)', SMALL_SYSTEM_DOMAIN_LENGTHS),
+                                                     (1, '(<a> | <b> | <c>)', 'longDomain a length 20 longDomain b length 20 longDomain c length 20')]:
+        s_all = SMALL_SYSTEM[:-1]+' | '+s_new[1:]
+        domainLengthStr_all = SMALL_SYSTEM_DOMAIN_LENGTHS+' '+domainLengthStr_new
+        enumerator.settings['maxSpecies'] = math.inf
+        crn_all = enumerator.enumerateReactions(speciesListFor(s_all, domainLengthStr_all))
+        enumerator.settings['maxSpecies'] = maxSpecies
+        crn_partial = enumerator.enumerateReactions(smallSystem())
+        enumerator.settings['maxSpecies'] = math.inf
+        crn_resumed = enumerator.enumerateReactionsFrom(crn_partial, speciesListFor(s_new, domainLengthStr_new))
+        assert crnSummary(crn_resumed) == crnSummary(crn_all)
+        print('Resumed enumeration with new species '+s_new+' matches full enumeration: True')
+
+def test_schedulers():
+    enumerator = orderIndependentEnumerator()
+    crn_fifo = enumerator.enumerateReactions(smallSystem())
+    for scheduler in [Scheduler_SmallestFirst(), Scheduler_ClosestToInput()]:
+        enumerator.settings['scheduler'] = scheduler
+        crn = enumerator.enumerateReactions(smallSystem())
+        assert crnSummary(crn) == crnSummary(crn_fifo)
+        print('Enumeration with '+type(scheduler).__name__+' matches first-in, first-out enumeration: True')
+    # Only the input species are expanded to depth 1, and the species they produce are left unexpanded
+    enumerator.settings['scheduler'] = Scheduler_FIFO(maxDepth=1)
+    crn = enumerator.enumerateReactions(smallSystem())
+    print('Enumeration to depth 1: '+str(len(crn.species))+' species ('+str(len(crn.unexpanded_species))+' unexpanded) and '+str(len(crn.reactions))+' reactions.')
+    inputs = set(sp.printAsProcess() for sp in smallSystem())
+    unexpanded = set(sp.printAsProcess() for sp in crn.unexpanded_species)
+    assert len(unexpanded) > 0 and unexpanded.isdisjoint(inputs)
+    assert set(crnSummary(crn)[0]) == inputs | unexpanded
+    assert set(crnSummary(crn)[0]) < set(crnSummary(crn_fifo)[0])
+    assert all(sp.printAsProcess() in inputs for r in crn.reactions for sp in r.reactants)
+    print('Enumeration to depth 1 is truncated: True')
+
 def getTestNames():
     all_test_names = sorted([fname for fname in globals().keys() if fname.startswith('test')])
     test_names = []